@@ -0,0 +1,64 @@
+# IFCBuilder (bpy.ops path) and run_batch with and without the batch edit context.
+#
+#   blender -b --factory-startup --python tests/Benchmark/BM_BlenderOperator_Batch_20261018_001_01.py -- [elements]
+#
+# Each run gets a fresh scene with a parsed IFCLiveIndex registered. A counting
+# depsgraph_update_post handler stands in for other add-ons and stays registered in both runs:
+# its count is the number of depsgraph evaluations the stage caused. Inside the batch the builder
+# uses bpy.data instead of object.add, so the count should drop to the final update; run_batch
+# still evaluates once per FBX export operator.
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.realpath(__file__)))
+
+import bpy
+from bm_utils import load_script, script_args, timed, dump_json
+from bm_scene import build_ifc_scene
+
+ifc_etree = load_script("UT_3_IFCETree_20230504_001_01.py", "ut_ifc_etree")
+batch_fbx = load_script("b3d_BatchFBXExporter_4.6.py", "ut_batch_fbx")
+
+calls = {"depsgraph_update_post": 0}
+
+
+def on_depsgraph_update(scene, depsgraph):
+    calls["depsgraph_update_post"] += 1
+
+
+def run_builder(elements: int, batch: bool) -> dict:
+    build_ifc_scene(elements, storeys=20)
+    live_index = ifc_etree.register_live_index("IfcProject/")
+    parser = live_index.parser
+    calls["depsgraph_update_post"] = 0
+    seconds, _ = timed(ifc_etree.IFCBuilder(parser, batch=batch, mode="ops").execute)
+    ifc_etree.unregister_live_index()
+    return {"stage": "IFCBuilder", "batch": batch, "seconds": round(seconds, 4), **calls}
+
+
+def run_fbx(elements: int, batch: bool, workdir: str) -> dict:
+    build_ifc_scene(elements, storeys=20, mesh=True)
+    bpy.ops.wm.save_as_mainfile(filepath=os.path.join(workdir, f"batch_{batch}.blend"))
+    calls["depsgraph_update_post"] = 0
+    seconds, _ = timed(batch_fbx.run_batch, "IfcBuilding/", batch=batch)
+    return {"stage": "run_batch", "batch": batch, "seconds": round(seconds, 4), **calls}
+
+
+def main():
+    args = [int(arg) for arg in script_args()]
+    elements = args[0] if args else 5_000
+
+    bpy.app.handlers.depsgraph_update_post.append(on_depsgraph_update)
+    results = [run_builder(elements, batch) for batch in (False, True)]
+    with tempfile.TemporaryDirectory() as workdir:
+        results += [run_fbx(elements, batch, workdir) for batch in (False, True)]
+    bpy.app.handlers.depsgraph_update_post.remove(on_depsgraph_update)
+
+    for stage in ("IFCBuilder", "run_batch"):
+        plain, batched = [result["seconds"] for result in results if result["stage"] == stage]
+        results.append({"stage": stage, "speedup": round(plain / batched, 2) if batched else None})
+    dump_json({"elements": elements, "results": results})
+
+
+main()
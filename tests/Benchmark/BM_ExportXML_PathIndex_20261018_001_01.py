@@ -0,0 +1,79 @@
+# Benchmark for XMLCreate.add_element with the incremental path index.
+#
+#   blender -b --factory-startup --python tests/Benchmark/BM_ExportXML_PathIndex_20261018_001_01.py -- [sizes...]
+#
+# Only the Et side of the exporter is exercised, so no IFC scene is needed.
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.realpath(__file__)))
+
+from bm_utils import load_script, script_args, timed, dump_json
+
+export_xml = load_script("ExportXML/UT_ExportXML_20230427_003_01.py", "ut_export_xml")
+
+SIZES = [1_000, 10_000, 100_000, 500_000]
+STOREYS = 100
+
+
+def new_xml_create():
+    settings = export_xml.XMLCreateSettings.factory("OCMS2_0", "2023.02.16", "Unity")
+    xml_create = export_xml.XMLCreate.__new__(export_xml.XMLCreate)
+    xml_create.root = settings.root
+    xml_create.elements = export_xml.XMLPathIndex(settings.root)
+    xml_create.writer = None
+    xml_create.incremental = False
+    return xml_create
+
+
+def new_content(parent_path, name):
+    attributes = {
+        "type": "Object",
+        "category": "0",
+        "name": name,
+        "alias": name,
+        "id": "",
+        "remark": "",
+        "model": name,
+        "time": "2023/05/04 00:00",
+        "noted": "created"
+    }
+    transform = {
+        "position": ["0.0", "0.0", "0.0"],
+        "rotation": ["0.0", "0.0", "0.0"],
+        "scale": ["1.0", "1.0", "1.0"]
+    }
+    return {
+        "parent_path": parent_path,
+        "this_path": None,
+        "attributes": attributes,
+        "transform": transform
+    }
+
+
+def run(count):
+    xml_create = new_xml_create()
+    building = xml_create.add_element(new_content("root", "Building"))
+    storeys = [xml_create.add_element(new_content(building["this_path"], f"Storey_{i}"))
+               for i in range(STOREYS)]
+    for i in range(count - STOREYS - 1):
+        xml_create.add_element(new_content(storeys[i % STOREYS]["this_path"], f"Element_{i}"))
+    return len(xml_create.elements)
+
+
+def main():
+    sizes = [int(arg) for arg in script_args()] or SIZES
+    results = []
+    for count in sizes:
+        seconds, elements = timed(run, count)
+        results.append({
+            "objects": count,
+            "indexed": elements,
+            "seconds": round(seconds, 4),
+            "objects_per_sec": round(count / seconds, 1),
+            "us_per_object": round(seconds / count * 1e6, 3)
+        })
+    dump_json(results)
+
+
+main()
@@ -0,0 +1,56 @@
+# IFCBuilder.set_transform: per-object BlenderOperator setters against the foreach_set bulk path.
+#
+#   blender -b --factory-startup --python tests/Benchmark/BM_IFCBuilder_Transform_20261018_001_01.py -- [elements]
+#
+# Both run on the same bulk-built instances; the results are compared before timing is reported.
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.realpath(__file__)))
+
+import bpy
+import numpy as np
+from bm_utils import load_script, script_args, timed, dump_json
+from bm_scene import build_ifc_scene
+
+ifc_etree = load_script("UT_3_IFCETree_20230504_001_01.py", "ut_ifc_etree")
+
+
+def set_transform_per_object(info):
+    operator = ifc_etree.BlenderOperator()
+    for i, inst in enumerate(info.ifc_inst):
+        operator.set_location(inst, info.position[i].tolist())
+        operator.set_rotation(inst, info.rotation[i].tolist())
+        operator.set_scale(inst, info.scale[i].tolist())
+
+
+def read_locations(info) -> np.ndarray:
+    return np.array([bpy.data.objects[inst].location for inst in info.ifc_inst], dtype=np.float32)
+
+
+def main():
+    args = [int(arg) for arg in script_args()]
+    elements = args[0] if args else 100_000
+
+    scene = build_ifc_scene(elements, storeys=20)
+    parser = ifc_etree.IFCParser("IfcProject/")
+    parser.execute()
+    builder = ifc_etree.IFCBuilder(parser, bulk=True)
+    builder.execute()
+    info = builder.ifc_info
+
+    per_object, _ = timed(set_transform_per_object, info)
+    expected = read_locations(info)
+    bulk, _ = timed(builder.set_transform)
+
+    dump_json({
+        "scene": scene,
+        "instances": len(info),
+        "per_object_seconds": round(per_object, 4),
+        "foreach_set_seconds": round(bulk, 4),
+        "speedup": round(per_object / bulk, 1) if bulk else None,
+        "same_locations": bool(np.allclose(expected, read_locations(info)))
+    })
+
+
+main()
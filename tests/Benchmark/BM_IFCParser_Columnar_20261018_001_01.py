@@ -0,0 +1,61 @@
+# Memory per element of IFCParser.ifc_info: former dict-of-dicts layout against the columnar IFCInfo.
+#
+#   blender -b --factory-startup --python tests/Benchmark/BM_IFCParser_Columnar_20261018_001_01.py -- [elements]
+#
+# Both layouts are built from the same parse, so the object name strings they share are not counted.
+import os
+import sys
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.realpath(__file__)))
+
+from bm_utils import load_script, script_args, dump_json
+from bm_scene import build_ifc_scene
+
+ifc_etree = load_script("UT_3_IFCETree_20230504_001_01.py", "ut_ifc_etree")
+
+
+def retained_bytes(func):
+    tracemalloc.start()
+    result = func()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, result
+
+
+def rebuild_columnar(parser):
+    source = parser.ifc_info
+    info = ifc_etree.IFCInfo()
+    for name in source.keys():
+        row = source[name]
+        record = ifc_etree.IFCRecord(row["bl_type"], row["ifc_parent"], parser.tokenize(name), None)
+        info.append(name, record)
+    info.freeze(parser.transforms)
+    return info
+
+
+def main():
+    args = [int(arg) for arg in script_args()]
+    elements = args[0] if args else 200_000
+
+    scene = build_ifc_scene(elements, storeys=20)
+    parser = ifc_etree.IFCParser("IfcProject/")
+    parser.execute()
+    count = len(parser.ifc_info)
+
+    legacy_bytes, legacy = retained_bytes(parser.ifc_info.to_dicts)
+    del legacy
+    columnar_bytes, columnar = retained_bytes(lambda: rebuild_columnar(parser))
+
+    dump_json({
+        "scene": scene,
+        "records": count,
+        "dict_of_dicts_bytes": legacy_bytes,
+        "dict_of_dicts_bytes_per_element": round(legacy_bytes / count, 1),
+        "columnar_bytes": columnar_bytes,
+        "columnar_bytes_per_element": round(columnar_bytes / count, 1),
+        "ratio": round(legacy_bytes / columnar_bytes, 2)
+    })
+
+
+main()
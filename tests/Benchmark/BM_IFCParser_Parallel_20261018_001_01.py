@@ -0,0 +1,54 @@
+# IFCParser.read_ifc speedup as process pool workers are added.
+#
+#   blender -b --factory-startup --python tests/Benchmark/BM_IFCParser_Parallel_20261018_001_01.py -- \
+#       [elements] [workers ...]
+#
+# One scene and one TransformSnapshot for every run, so only classification and merging differ.
+# workers 0 is the serial read_ifc; the parallel times include starting the spawned pool. Each
+# parallel result is compared with the serial one before its time is reported.
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.realpath(__file__)))
+
+import numpy as np
+from bm_utils import load_script, script_args, timed, dump_json
+from bm_scene import build_ifc_scene
+
+ifc_etree = load_script("UT_3_IFCETree_20230504_001_01.py", "ut_ifc_etree")
+
+
+def same_info(a, b) -> bool:
+    if a.names != b.names or a.external_parents != b.external_parents or not np.array_equal(a.parent, b.parent):
+        return False
+    return all(list(a.columns[key].values[code] for code in a.columns[key].codes) ==
+               list(b.columns[key].values[code] for code in b.columns[key].codes) for key in a.categories)
+
+
+def main():
+    args = [int(arg) for arg in script_args()]
+    elements = args[0] if args else 300_000
+    workers = args[1:] or [0, 1, 2, 4, 8, 16, 32]
+
+    scene = build_ifc_scene(elements, storeys=20)
+    transforms = None
+    results = []
+    serial = None
+    for count in workers:
+        parser = ifc_etree.IFCParser("IfcProject/", workers=count)
+        parser.sorting()
+        if transforms is None:
+            transforms = parser.capture_transforms()
+        seconds, _ = timed(parser.read_ifc, transforms)
+        if serial is None and count == 0:
+            serial = (seconds, parser.ifc_info)
+        results.append({
+            "workers": count,
+            "seconds": round(seconds, 4),
+            "speedup": round(serial[0] / seconds, 2) if serial and seconds else None,
+            "same_result": same_info(serial[1], parser.ifc_info) if serial else None
+        })
+    dump_json({"scene": scene, "names": len(parser.ifc_info), "results": results})
+
+
+main()
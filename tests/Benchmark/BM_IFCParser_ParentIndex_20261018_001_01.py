@@ -0,0 +1,63 @@
+# Before/after timing of IFCParser.define_ifc_parent on a synthetic scene.
+#
+#   blender -b --factory-startup --python tests/Benchmark/BM_IFCParser_ParentIndex_20261018_001_01.py -- [elements] [legacy_sample]
+#
+# The old collection scan is far too slow to run over 100k objects, so it is timed on
+# `legacy_sample` objects and extrapolated to the whole scene.
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.realpath(__file__)))
+
+import bpy
+from bm_utils import load_script, script_args, timed, dump_json
+from bm_scene import build_ifc_scene
+
+ifc_etree = load_script("UT_3_IFCETree_20230504_001_01.py", "ut_ifc_etree")
+
+
+def legacy_define_ifc_parent(parser, ob: str):
+    for coll in parser.ifc_collections.keys():
+        if ob in bpy.data.collections[coll].children.keys():
+            return coll
+        if ob in bpy.data.collections[coll].objects.keys():
+            if ob == coll:
+                return None
+            return coll
+
+
+def main():
+    args = [int(arg) for arg in script_args()]
+    elements = args[0] if args else 100_000
+    legacy_sample = args[1] if len(args) > 1 else 1_000
+
+    scene = build_ifc_scene(elements, storeys=20)
+    parser = ifc_etree.IFCParser("IfcProject/")
+    parser.sorting()
+    names = list(parser.ifc_objects.keys())
+
+    def run_indexed():
+        parser.index_parents()
+        return [parser.define_ifc_parent(ob) for ob in names]
+
+    def run_legacy():
+        return [legacy_define_ifc_parent(parser, ob) for ob in names[:legacy_sample]]
+
+    indexed_seconds, indexed = timed(run_indexed)
+    legacy_seconds, legacy = timed(run_legacy)
+    sample = min(legacy_sample, len(names))
+    legacy_total = legacy_seconds / sample * len(names)
+
+    dump_json({
+        "scene": scene,
+        "parsed_objects": len(names),
+        "legacy_sample": sample,
+        "legacy_sample_seconds": round(legacy_seconds, 4),
+        "legacy_estimated_seconds": round(legacy_total, 2),
+        "indexed_seconds": round(indexed_seconds, 4),
+        "speedup": round(legacy_total / indexed_seconds, 1),
+        "same_result": legacy == indexed[:sample]
+    })
+
+
+main()
@@ -0,0 +1,57 @@
+# Memory report of the parse / build / ETree / XML stages on one synthetic IFC scene.
+#
+#   blender -b --factory-startup --python tests/Benchmark/BM_Pipeline_Memory_20261018_001_01.py -- \
+#       --elements 100000 --storeys 20 --top 10 --output memory.json
+#
+# Every stage runs under the same MemoryProfiler, so growth_bytes is what the stage kept alive
+# and peak_bytes what it needed on the way. The table is printed, the full report (with the top
+# call sites) goes to --output. XMLCreate reuses the parser's transform snapshot, as it does when
+# given an IFCLiveIndex.parser.
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.realpath(__file__)))
+
+import bpy
+from bm_utils import load_script, script_args
+from bm_scene import build_ifc_scene
+
+ifc_etree = load_script("UT_3_IFCETree_20230504_001_01.py", "ut_ifc_etree")
+export_xml = load_script("ExportXML/UT_ExportXML_20230427_003_01.py", "ut_export_xml")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--elements", type=int, default=100_000)
+    parser.add_argument("--storeys", type=int, default=20)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--frames", type=int, default=1)
+    parser.add_argument("--bulk", action="store_true")
+    parser.add_argument("--output", default=None)
+    return parser.parse_args(script_args())
+
+
+def main():
+    args = parse_args()
+    build_ifc_scene(args.elements, args.storeys)
+    profiler = ifc_etree.MemoryProfiler(top=args.top, frames=args.frames)
+
+    ifc_parser = ifc_etree.IFCParser("IfcProject/", profiler=profiler)
+    ifc_parser.execute()
+    ifc_builder = ifc_etree.IFCBuilder(ifc_parser, bulk=args.bulk)
+    ifc_builder.execute()
+    ifc_etree.IFCETree(ifc_builder).execute()
+    settings = export_xml.XMLCreateSettings.factory("OCMS2_0", "2023.02.16", "Unity")
+    with tempfile.TemporaryDirectory() as workdir:
+        export_xml.XMLCreate(settings, profiler=profiler, parser=ifc_parser).execute(os.path.join(workdir, "memory.xml"))
+    profiler.stop()
+
+    print(f"Blender {bpy.app.version_string}, {args.elements} elements, {args.storeys} storeys")
+    print(profiler.table())
+    if args.output:
+        profiler.to_json(args.output)
+
+
+main()
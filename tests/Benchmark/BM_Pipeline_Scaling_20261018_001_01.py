@@ -0,0 +1,84 @@
+# Scaling benchmark of the parse / build / ETree / XML / FBX stages on synthetic IFC scenes.
+#
+#   blender -b --factory-startup --python tests/Benchmark/BM_Pipeline_Scaling_20261018_001_01.py -- \
+#       --sizes 1000 10000 100000 --storeys 20 --output bench.json [--skip run_batch]
+#
+# Every size gets a fresh scene from bm_scene.build_ifc_scene. The blend file is saved to a
+# temporary folder first because run_batch writes its FBX files next to it. run_batch removes the
+# source collections, so it always runs last.
+#
+# Each size runs twice on its own fresh scene: once untraced for the timings, once under
+# tracemalloc for the Python memory figures, so tracing overhead never shows up in seconds.
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.realpath(__file__)))
+
+import bpy
+from bm_utils import load_script, script_args, measure, measure_memory, dump_json
+from bm_scene import build_ifc_scene
+
+ifc_etree = load_script("UT_3_IFCETree_20230504_001_01.py", "ut_ifc_etree")
+export_xml = load_script("ExportXML/UT_ExportXML_20230427_003_01.py", "ut_export_xml")
+batch_fbx = load_script("b3d_BatchFBXExporter_4.6.py", "ut_batch_fbx")
+
+STAGES = ["IFCParser", "IFCBuilder", "IFCETree", "XMLCreate", "run_batch"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--storeys", type=int, default=20)
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--skip", nargs="*", default=[], choices=STAGES)
+    return parser.parse_args(script_args())
+
+
+def run_stages(elements: int, args, workdir: str, traced: bool):
+    scene = build_ifc_scene(elements, args.storeys, mesh="run_batch" not in args.skip)
+    bpy.ops.wm.save_as_mainfile(filepath=os.path.join(workdir, f"bench_{elements}.blend"))
+    objects = scene["objects"]
+
+    ifc_parser = ifc_etree.IFCParser("IfcProject/")
+    ifc_builder = ifc_etree.IFCBuilder(ifc_parser)
+    blender_etree = ifc_etree.IFCETree(ifc_builder)
+    xml_create = None
+    stages = {
+        "IFCParser": lambda: ifc_parser.execute(),
+        "IFCBuilder": lambda: ifc_builder.execute(),
+        "IFCETree": lambda: blender_etree.execute(),
+        "XMLCreate": lambda: xml_create.execute(os.path.join(workdir, f"bench_{elements}.xml")),
+        "run_batch": lambda: batch_fbx.run_batch("IfcBuilding/")
+    }
+
+    results = []
+    for stage in STAGES:
+        if stage in args.skip:
+            continue
+        if stage == "XMLCreate":
+            settings = export_xml.XMLCreateSettings.factory("OCMS2_0", "2023.02.16", "Unity")
+            xml_create = export_xml.XMLCreate(settings)
+        results.append(measure_memory(stages[stage]) if traced else measure(stage, objects, stages[stage]))
+    return scene, results
+
+
+def run_size(elements: int, args, workdir: str) -> dict:
+    scene, timings = run_stages(elements, args, workdir, traced=False)
+    _, memory = run_stages(elements, args, workdir, traced=True)
+    return {"scene": scene, "stages": [{**timing, **traced} for timing, traced in zip(timings, memory)]}
+
+
+def main():
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as workdir:
+        runs = [run_size(elements, args, workdir) for elements in args.sizes]
+    dump_json({
+        "blender": bpy.app.version_string,
+        "storeys": args.storeys,
+        "runs": runs
+    }, args.output)
+
+
+main()
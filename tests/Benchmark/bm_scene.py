@@ -0,0 +1,51 @@
+import bpy
+
+ELEMENT_CLASSES = ["IfcWall", "IfcSlab", "IfcColumn", "IfcBeam", "IfcDoor", "IfcWindow"]
+
+
+def new_collection(name: str, parent: bpy.types.Collection) -> bpy.types.Collection:
+    coll = bpy.data.collections.new(name)
+    parent.children.link(coll)
+    # Every IFC collection carries an Empty with its own name, like the BlenderBIM import does.
+    ob = bpy.data.objects.new(name, None)
+    coll.objects.link(ob)
+    return coll
+
+
+def clear_scene() -> None:
+    for ob in list(bpy.data.objects):
+        bpy.data.objects.remove(ob)
+    for coll in list(bpy.data.collections):
+        bpy.data.collections.remove(coll)
+
+
+def build_ifc_scene(elements: int = 1000, storeys: int = 10, mesh: bool = False) -> dict:
+    """Create an IfcProject/ -> IfcSite/ -> IfcBuilding/ -> IfcBuildingStorey/ -> element hierarchy.
+
+    Elements are spread round robin over the storeys and over ELEMENT_CLASSES. With mesh=True every
+    element shares one small mesh, so the FBX batch has something to export.
+    """
+    clear_scene()
+    scene_coll = bpy.context.scene.collection
+    project = new_collection("IfcProject/", scene_coll)
+    site = new_collection("IfcSite/", project)
+    building = new_collection("IfcBuilding/", site)
+    storey_colls = [new_collection(f"IfcBuildingStorey/{i:02d}FL", building) for i in range(storeys)]
+
+    data = None
+    if mesh:
+        data = bpy.data.meshes.new("Element")
+        data.from_pydata([(0, 0, 0), (1, 0, 0), (0, 1, 0)], [], [(0, 1, 2)])
+
+    for i in range(elements):
+        ifc_class = ELEMENT_CLASSES[i % len(ELEMENT_CLASSES)]
+        ob = bpy.data.objects.new(f"{ifc_class}/Element_{i}", data)
+        ob.location = (i % 100, (i // 100) % 100, i // 10000)
+        storey_colls[i % storeys].objects.link(ob)
+
+    return {
+        "elements": elements,
+        "storeys": storeys,
+        "collections": storeys + 3,
+        "objects": elements + storeys + 3
+    }
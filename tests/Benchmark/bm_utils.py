@@ -0,0 +1,66 @@
+import importlib.util
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+TESTS_DIR = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+sys.path.append(TESTS_DIR)
+from bim_common import max_rss_bytes
+
+
+def load_script(relpath: str, name: str):
+    """Import one of the tests/ scripts as a module without running its __main__ block."""
+    path = os.path.join(TESTS_DIR, relpath)
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def script_args() -> list:
+    """Arguments after the `--` separator of `blender -b --python script.py -- ...`."""
+    if "--" in sys.argv:
+        return sys.argv[sys.argv.index("--") + 1:]
+    return sys.argv[1:]
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def measure(stage: str, objects: int, func, *args, **kwargs) -> dict:
+    """Time one stage; no tracing, so the numbers are those of a normal run."""
+    seconds, _ = timed(func, *args, **kwargs)
+    return {
+        "stage": stage,
+        "objects": objects,
+        "seconds": round(seconds, 4),
+        "objects_per_sec": round(objects / seconds, 1) if seconds else None,
+        "max_rss_bytes": max_rss_bytes()
+    }
+
+
+def measure_memory(func, *args, **kwargs) -> dict:
+    """Python peak and retained bytes of one stage under tracemalloc; run it apart from measure()."""
+    tracemalloc.start()
+    func(*args, **kwargs)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "peak_python_bytes": peak,
+        "retained_python_bytes": current
+    }
+
+
+def dump_json(results, path=None):
+    text = json.dumps(results, indent=4, ensure_ascii=False)
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
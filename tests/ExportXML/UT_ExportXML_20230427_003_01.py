@@ -1,9 +1,17 @@
+import ast
 import bpy
+import logging
 import xml.etree.ElementTree as Et
+from contextlib import nullcontext
 from datetime import datetime
 import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from bim_common import TransformSnapshot, configure_logging
+
+logger = configure_logging().getChild("xml")
 
-os.system('cls')
 output = "C:\\Users\\eos\\PycharmProjects\\blender-bim-to-xml\\tests\\ExportXML"
 filename = "UnitTest_ExportXML_20230425_001.xml"
 
@@ -33,13 +41,163 @@ class XMLCreateSettings:
         return settings
 
 
+class XMLPathIndex:
+    def __init__(self, root: Et.Element, root_path: str = 'root'):
+        self.root = root
+        self.root_path = root_path
+        self.elements = {root_path: root}
+
+    def __contains__(self, path: str) -> bool:
+        return path in self.elements
+
+    def __len__(self) -> int:
+        return len(self.elements)
+
+    def get(self, path: str) -> Et.Element:
+        return self.elements.get(path)
+
+    def add(self, parent_path: str, element: Et.Element) -> str:
+        this_path = f'{parent_path}/{element.get("name")}'
+        self.elements[this_path] = element
+        return this_path
+
+    def discard(self, path: str) -> None:
+        self.elements.pop(path, None)
+
+    @classmethod
+    def from_tree(cls, root: Et.Element, root_path: str = 'root'):
+        index = cls(root, root_path)
+        stack = [(root, root_path)]
+        while stack:
+            node, path = stack.pop()
+            for child in node.iterfind("Object"):
+                stack.append((child, index.add(path, child)))
+        return index
+
+
+class XMLEntryIndex:
+    """Exported IFC collections by ifc_info head, name, data path and this_path (first entry wins)."""
+
+    keys = ("head", "name", "data", "this_path")
+
+    def __init__(self):
+        self.entries = {key: {} for key in self.keys}
+
+    def __len__(self) -> int:
+        return len(self.entries["data"])
+
+    def add(self, ifc_info: dict, this_path: str, bl_object: bpy.types.ID) -> None:
+        self.entries["head"].setdefault(ifc_info["head"], bl_object)
+        self.entries["name"].setdefault(ifc_info["name"], bl_object)
+        self.entries["data"].setdefault(ifc_info["data"], bl_object)
+        self.entries["this_path"].setdefault(this_path, bl_object)
+
+    def find(self, key: str, value: str) -> bpy.types.ID:
+        return self.entries[key].get(value)
+
+    def rebuild(self, collections=None) -> list:
+        # The stored ifc_info is a dict literal, parsed once here instead of on every lookup.
+        collections = bpy.data.collections if collections is None else collections
+        self.entries = {key: {} for key in self.keys}
+        bl_objects = []
+        for coll in collections:
+            if "ifc_info" not in coll or "this_path" not in coll:
+                continue
+            self.add(ast.literal_eval(coll["ifc_info"]), coll["this_path"], coll)
+            bl_objects.append(coll)
+        return bl_objects
+
+
+class XMLStreamWriter:
+    """Write the document while it is being created, in the same layout as Et.indent + ElementTree.write.
+
+    Every element is written as soon as it is added and closed once an element with another parent
+    arrives, so elements have to be added parent first, depth first. The document goes to a ".part"
+    file next to path and only replaces path when close() completes it; abort() drops it.
+    """
+
+    def __init__(self, path, root: Et.Element, space: str = " " * 4, root_path: str = 'root'):
+        self.path = path
+        self.root = root
+        self.space = space
+        self.root_path = root_path
+        self.part_path = f"{path}.part"
+        self.file = None
+        self.stack = []
+
+    def open(self):
+        self.file = open(self.part_path, "w", encoding="utf-8", errors="xmlcharrefreplace")
+        self.file.write(self.start_tag(self.root))
+        for child in self.root:
+            self.write_subtree(child, 1)
+        return self
+
+    def close(self) -> None:
+        self.close_until(self.root_path)
+        self.file.write(f"\n</{self.root.tag}>")
+        self.file.close()
+        self.file = None
+        os.replace(self.part_path, self.path)
+
+    def abort(self) -> None:
+        if self.file is None:
+            return
+        self.file.close()
+        self.file = None
+        os.remove(self.part_path)
+
+    @staticmethod
+    def start_tag(element: Et.Element) -> str:
+        shell = Et.Element(element.tag, element.attrib)
+        return Et.tostring(shell, encoding="unicode")[:-len(" />")] + ">"
+
+    def write_subtree(self, element: Et.Element, level: int) -> None:
+        tail, element.tail = element.tail, None
+        Et.indent(element, space=self.space, level=level)
+        self.file.write("\n" + self.space * level + Et.tostring(element, encoding="unicode"))
+        element.tail = tail
+
+    def close_until(self, parent_path: str) -> list:
+        closed = []
+        while self.stack and self.stack[-1][0] != parent_path:
+            path, tag = self.stack.pop()
+            self.file.write("\n" + self.space * (len(self.stack) + 1) + f"</{tag}>")
+            closed.append(path)
+        if not self.stack and parent_path != self.root_path:
+            raise ValueError(f"[XMLStreamWriter] parent \"{parent_path}\" is not open.")
+        return closed
+
+    def write(self, element: Et.Element, parent_path: str, this_path: str) -> list:
+        closed = self.close_until(parent_path)
+        level = len(self.stack) + 1
+        self.file.write("\n" + self.space * level + self.start_tag(element))
+        for child in element:
+            self.write_subtree(child, level + 1)
+        self.stack.append((this_path, element.tag))
+        return closed
+
+
 class XMLCreate:
-    def __init__(self, xml_create_settings: XMLCreateSettings):
+    compared_attributes = ("type", "category", "name", "alias", "id", "remark", "model", "noted")
+
+    def __init__(self, xml_create_settings: XMLCreateSettings, stream: bool = False, incremental: bool = False,
+                 profiler=None, parser=None):
         self.xml_create_settings = xml_create_settings
+        # Anything with a stage(name, elements) context manager, e.g. MemoryProfiler of the IFCETree script.
+        self.profiler = profiler
+        # IFCParser of the IFCETree script (or IFCLiveIndex.parser): its transform snapshot is read
+        # instead of capturing every object again.
+        self.parser = parser
+        self.stream = stream
+        self.writer = None
+        self.incremental = incremental
+        self.previous = None
+        self.report = {"reused": 0, "rebuilt": 0}
         self.root = xml_create_settings.root
         self.tree = xml_create_settings.tree
         self.data_source = xml_create_settings.data_source
         self.bl_op = BlenderOperator()
+        self.bl_op.invalidate()
         self.bl_col_root = self.bl_op.get_collection_by_name("IfcProject/")
         self.bl_obj_root = self.bl_op.add_object("Root")
         self.bl_op.move_to_collection(self.bl_obj_root, self.bl_col_root)
@@ -53,20 +211,78 @@ class XMLCreate:
         self.xml_building = None
         self.xml_building_storey = {}
         self.bl_objects = set()
-        self.elements = {}
+        self.index = XMLEntryIndex()
+        self.elements = XMLPathIndex(self.root)
+        self.transforms = None
+
+    def execute(self, path=file):
+        with self.profiler.stage("XMLCreate") if self.profiler else nullcontext({}) as stage:
+            self.export(path)
+            stage["elements"] = len(self.index)
+
+    def export(self, path=file):
+        if self.incremental:
+            self.previous = self.load_previous(path)
+        if self.stream:
+            self.writer = XMLStreamWriter(path, self.root).open()
+        try:
+            self.store_collections()
+            self.parse_ifc_collections()
+            if self.parser is not None and self.parser.transforms is not None:
+                self.transforms = self.parser.transforms
+            else:
+                self.transforms = TransformSnapshot.from_objects(self.get_transform_objects())
+            self.create_xml_building()
+            for storey in self.ifc_building_storey.values():
+                self.create_xml_building_storey(storey)
+            self.export_xml(path)
+        finally:
+            # Still set only if the export failed; the previous file at path stays as it was.
+            if self.writer:
+                self.writer.abort()
+                self.writer = None
+        if self.incremental:
+            logger.info("[execute] %d subtrees reused, %d rebuilt.", self.report["reused"], self.report["rebuilt"])
+
+    @staticmethod
+    def load_previous(path) -> XMLPathIndex:
+        if not os.path.exists(path):
+            return None
+        return XMLPathIndex.from_tree(Et.parse(path).getroot())
 
-    def execute(self):
-        self.store_collections()
-        self.parse_ifc_collections()
-        self.create_xml_building()
-        for storey in self.ifc_building_storey.values():
-            self.create_xml_building_storey(storey)
-        self.export_xml(file)
+    @staticmethod
+    def matches_previous(previous: Et.Element, content: dict) -> bool:
+        # Everything the <Object> is made of except its time stamp, read from the file being replaced,
+        # so an export to another path or an unsaved .blend cannot vouch for it.
+        attributes = content["attributes"]
+        if any(previous.get(key) != attributes[key] for key in XMLCreate.compared_attributes):
+            return False
+        transform = previous.find("Transform")
+        if transform is None:
+            return False
+        written = {node.tag: (node.get("x"), node.get("y"), node.get("z")) for node in transform}
+        return written == {key: tuple(value) for key, value in content["transform"].items()}
+
+    def reuse_previous(self, content: dict) -> bool:
+        # An unchanged <Object> is kept as it was, time stamp included.
+        if not self.incremental:
+            return False
+        this_path = f'{content["parent_path"]}/{content["attributes"]["name"]}'
+        previous = self.previous.get(this_path) if self.previous else None
+        if previous is None or not self.matches_previous(previous, content):
+            self.report["rebuilt"] += 1
+            return False
+        content["attributes"] = dict(previous.attrib)
+        self.report["reused"] += 1
+        return True
 
     def store_collections(self, collection=bpy.context.view_layer.layer_collection):
-        self.collections[collection.name] = collection
-        for collection in collection.children:
-            self.store_collections(collection)
+        # Layer collections have no children_recursive; same pre-order as the former recursion.
+        stack = [collection]
+        while stack:
+            collection = stack.pop()
+            self.collections[collection.name] = collection
+            stack.extend(list(collection.children)[::-1])
 
     def parse_ifc_collections(self):
         for collection in self.collections.values():
@@ -87,8 +303,8 @@ class XMLCreate:
                     self.ifc_building_storey[content["name"]] = content
 
     def create_xml_building(self):
-        parent, parent_path = self.get_elements_with_paths(self.root)[-1]
-        print(f"[create_xml_building] parent_path: {parent_path}")
+        parent_path = self.elements.root_path
+        logger.debug("[create_xml_building] parent_path: %s", parent_path)
 
         attributes = {
             "type": "Building",
@@ -104,26 +320,7 @@ class XMLCreate:
 
         collection = bpy.data.collections[self.ifc_building["data"]]
 
-        transform = {}
-
-        for obj in collection.objects:
-            if obj.type == "EMPTY":
-                if obj.name == collection.name:
-                    transform["position"] = [
-                        obj.matrix_world.to_translation().x.__str__(),
-                        obj.matrix_world.to_translation().y.__str__(),
-                        obj.matrix_world.to_translation().z.__str__()
-                    ]
-                    transform["rotation"] = [
-                        obj.matrix_world.to_euler().x.__str__(),
-                        obj.matrix_world.to_euler().y.__str__(),
-                        obj.matrix_world.to_euler().z.__str__()
-                    ]
-                    transform["scale"] = [
-                        obj.matrix_world.to_scale().x.__str__(),
-                        obj.matrix_world.to_scale().y.__str__(),
-                        obj.matrix_world.to_scale().z.__str__()
-                    ]
+        transform = self.get_transform(collection)
 
         content = {
             "bl_object": collection.name,
@@ -165,26 +362,7 @@ class XMLCreate:
 
         collection = bpy.data.collections[building_storey["data"]]
 
-        transform = {}
-
-        for obj in collection.objects:
-            if obj.type == "EMPTY":
-                if obj.name == collection.name:
-                    transform["position"] = [
-                        obj.matrix_world.to_translation().x.__str__(),
-                        obj.matrix_world.to_translation().y.__str__(),
-                        obj.matrix_world.to_translation().z.__str__()
-                    ]
-                    transform["rotation"] = [
-                        obj.matrix_world.to_euler().x.__str__(),
-                        obj.matrix_world.to_euler().y.__str__(),
-                        obj.matrix_world.to_euler().z.__str__()
-                    ]
-                    transform["scale"] = [
-                        obj.matrix_world.to_scale().x.__str__(),
-                        obj.matrix_world.to_scale().y.__str__(),
-                        obj.matrix_world.to_scale().z.__str__()
-                    ]
+        transform = self.get_transform(collection)
 
         content = {
             "bl_object": collection.name,
@@ -201,7 +379,30 @@ class XMLCreate:
         bl_object = self.add_properties(content)
         self.bl_objects.add(bl_object)
 
+    def get_transform_objects(self) -> list:
+        # Only the building and storey Empties are exported with a transform.
+        objects = []
+        for content in [self.ifc_building, *self.ifc_building_storey.values()]:
+            collection = bpy.data.collections.get(content["data"]) if content else None
+            obj = collection.objects.get(collection.name) if collection else None
+            if obj and obj.type == "EMPTY":
+                objects.append(obj)
+        return objects
+
+    def get_transform(self, collection: bpy.types.Collection) -> dict:
+        obj = collection.objects.get(collection.name)
+        if not obj or obj.type != "EMPTY":
+            return {}
+        if obj.name not in self.transforms:
+            # Added after the parser's snapshot was taken.
+            return TransformSnapshot.from_objects([obj]).get(obj.name, str)
+        return self.transforms.get(obj.name, str)
+
     def export_xml(self, path):
+        if self.writer:
+            self.writer.close()
+            self.writer = None
+            return
         Et.indent(self.root, space=" " * 4)
         Et.ElementTree(self.root).write(path, encoding="utf-8")
 
@@ -262,15 +463,15 @@ class XMLCreate:
         return dt.strftime("%Y/%m/%d %H:%M")
 
     def iter_with_path(self, node: Et.Element, tag: str = None, root_path: str = 'root') -> any:
+        # Pre-order with an explicit stack: deep trees would hit the recursion limit.
         if tag == '*':
             tag = None
-        if tag is None or node.tag == tag:
-            yield node, root_path
-        for child in node:
-            current = child.get('name')
-            child_path = f'{root_path}/{current}'
-            for _child, _child_path in self.iter_with_path(child, tag, root_path=child_path):
-                yield _child, _child_path
+        stack = [(node, root_path)]
+        while stack:
+            node, path = stack.pop()
+            if tag is None or node.tag == tag:
+                yield node, path
+            stack.extend((child, f"{path}/{child.get('name')}") for child in reversed(node))
 
     def get_elements_with_paths(self, root: Et.Element) -> list:
         element = [(elem, path) for elem, path in self.iter_with_path(root, 'Object')]
@@ -289,15 +490,15 @@ class XMLCreate:
 
     def add_element(self, content):
         # bl_object = element["bl_object"]
+        self.reuse_previous(content)
         parent_path = content["parent_path"]
         attributes = content["attributes"]
         transform = content["transform"]
 
-        parent = self.root
-        if self.elements.keys():
-            parent = self.elements[parent_path]
-
-        sub = Et.SubElement(parent, "Object")
+        if self.writer:
+            sub = Et.Element("Object")
+        else:
+            sub = Et.SubElement(self.elements.get(parent_path), "Object")
         sub.set("type", attributes["type"])
         sub.set("category", attributes["category"])
         sub.set("name", attributes["name"])
@@ -307,12 +508,9 @@ class XMLCreate:
         sub.set("model", attributes["model"])
         sub.set("time", attributes["time"])
         sub.set("noted", attributes["noted"])
-        this, this_path = self.get_elements_with_paths(self.root)[-1]
-        self.elements[this_path] = this
+        this_path = self.elements.add(parent_path, sub)
         content["this_path"] = this_path
-        print(f"[add_element] this_path: {this_path}")
-        print(f"[add_element] attributes: {attributes}")
-        print(f"[add_element] transform: {transform}")
+        logger.debug("[add_element] this_path: %s attributes: %s transform: %s", this_path, attributes, transform)
 
         tr = Et.SubElement(sub, "Transform")
         pos = Et.SubElement(tr, "position")
@@ -328,48 +526,41 @@ class XMLCreate:
         scl.set("y", transform["scale"][1])
         scl.set("z", transform["scale"][2])
 
+        if self.writer:
+            for path in self.writer.write(sub, parent_path, this_path):
+                self.elements.discard(path)
+
         return content
 
-    @staticmethod
-    def add_properties(content):
+    def add_properties(self, content):
         bl_object = bpy.data.collections.get(content["bl_object"])
         attributes = content["attributes"]
         bl_object["ifc_info"] = content['ifc_info'].__str__()
-        print(f"[add_properties] bl_props_ifc_info: {bl_object['ifc_info']}")
         bl_object["parent_path"] = content["parent_path"].__str__()
-        print(f"[add_properties] bl_props_parent_path: {bl_object['parent_path']}")
         bl_object["this_path"] = content["this_path"].__str__()
-        print(f"[add_properties] bl_props_this_path: {bl_object['this_path']}")
         bl_object["type"] = attributes["type"].__str__()
-        print(f"[add_properties] bl_props_type: {bl_object['type']}")
         bl_object["category"] = attributes["category"].__str__()
-        print(f"[add_properties] bl_props_category: {bl_object['category']}")
         bl_object["name"] = attributes["name"].__str__()
-        print(f"[add_properties] bl_props_name: {bl_object['name']}")
         bl_object["alias"] = attributes["alias"].__str__()
-        print(f"[add_properties] bl_props_alias: {bl_object['alias']}")
         bl_object["id"] = attributes["id"].__str__()
-        print(f"[add_properties] bl_props_id: {bl_object['id']}")
         bl_object["remark"] = attributes["remark"].__str__()
-        print(f"[add_properties] bl_props_remark: {bl_object['remark']}")
         bl_object["model"] = attributes["model"].__str__()
-        print(f"[add_properties] bl_props_model: {bl_object['model']}")
         bl_object["time"] = attributes["time"].__str__()
-        print(f"[add_properties] bl_props_time: {bl_object['time']}")
         bl_object["noted"] = attributes["noted"].__str__()
-        print(f"[add_properties] bl_props_noted: {bl_object['noted']}")
-        print(f"[add_properties] bl_object: {bl_object.name}")
+        logger.debug("[add_properties] \"%s\": ifc_info=%s this_path=%s attributes=%s",
+                     content["bl_object"], content["ifc_info"], content["this_path"], attributes)
+        self.index.add(content["ifc_info"], content["this_path"], bl_object)
         return bl_object
 
     def find_bl_object_by_ifc_info(self, key: str, value: str):
-        for obj in self.bl_objects:
-            print(f"[find_bl_object_by_ifc_info] obj: {obj}")
-            ifc_info = eval(obj["ifc_info"])
-            print(f"[find_bl_object_by_ifc_info] ifc_info: {ifc_info}")
-            if ifc_info[key] == value:
-                print(f"[find_bl_object_by_ifc_info] found: ifc_info[{key}] = {value}")
-                return obj
-        print(f"[find_bl_object_by_ifc_info] not found: ifc_info[{key}] = {value}")
+        obj = self.index.find(key, value)
+        if obj is None:
+            logger.warning("[find_bl_object_by_ifc_info] not found: ifc_info[%s] = %s", key, value)
+        return obj
+
+    def rebuild_index(self) -> None:
+        # For a reopened .blend: read back what add_properties stored on the collections.
+        self.bl_objects = set(self.index.rebuild())
 
 
 class BlenderElementTree:
@@ -378,6 +569,8 @@ class BlenderElementTree:
 
 
 class BlenderOperator:
+    object_collections = None
+
     @staticmethod
     def get_object_by_name(name) -> bpy.types.Object:
         if name in bpy.data.objects:
@@ -391,28 +584,47 @@ class BlenderOperator:
                 return col
         return None
 
-    @staticmethod
-    def get_collection_by_object(obj) -> bpy.types.Collection:
-        for col in bpy.data.collections:
+    @classmethod
+    def membership(cls) -> dict:
+        # object -> collections of bpy.data.collections, built in one pass on first use and kept
+        # current by the add/remove methods below; invalidate() after outside edits.
+        if cls.object_collections is None:
+            object_collections = {}
+            for col in bpy.data.collections:
+                for obj in col.objects:
+                    object_collections.setdefault(obj, []).append(col)
+            cls.object_collections = object_collections
+        return cls.object_collections
+
+    @classmethod
+    def invalidate(cls) -> None:
+        cls.object_collections = None
+
+    @classmethod
+    def get_collection_by_object(cls, obj) -> bpy.types.Collection:
+        cols = cls.membership().get(obj)
+        return cols[0] if cols else None
+
+    @classmethod
+    def remove_object_from_collection(cls, obj, col) -> None:
+        if col.is_embedded_data:
             if obj.name in col.objects:
-                return col
-        return None
-
-    @staticmethod
-    def remove_object_from_collection(obj, col) -> None:
-        if obj.name in col.objects:
+                col.objects.unlink(obj)
+            return
+        cols = cls.membership().get(obj, [])
+        if col in cols:
             col.objects.unlink(obj)
+            cols.remove(col)
 
-    @staticmethod
-    def add_object_to_collection(obj, col) -> None:
+    @classmethod
+    def add_object_to_collection(cls, obj, col) -> None:
         col.objects.link(obj)
+        if not col.is_embedded_data:
+            cls.membership().setdefault(obj, []).append(col)
 
-    def get_children_recursive(self, obj) -> list:
-        children = []
-        for child in obj.children:
-            children.append(child)
-            children.extend(self.get_children_recursive(child))
-        return children
+    @staticmethod
+    def get_children_recursive(obj) -> list:
+        return list(obj.children_recursive)
 
     def get_hierarchy(self, obj) -> list:
         hierarchy = [obj]
@@ -422,9 +634,8 @@ class BlenderOperator:
     def move_to_collection(self, obj, parent_col) -> None:
         hierarchy = self.get_hierarchy(obj)
         for obj in hierarchy:
-            for col in bpy.data.collections:
-                if obj.name in col.objects:
-                    self.remove_object_from_collection(obj, col)
+            for col in list(self.membership().get(obj, ())):
+                self.remove_object_from_collection(obj, col)
             self.add_object_to_collection(obj, parent_col)
 
     def set_parent(self, parent, child) -> bpy.types.Object:
@@ -435,32 +646,35 @@ class BlenderOperator:
         parent_col = self.get_collection_by_object(parent_obj)
         if not parent_col:
             return
-        hierarchy = self.get_hierarchy(child_obj)
-        for obj in hierarchy:
-            self.move_to_collection(obj, parent_col)
-            print(f"[command] \"{obj.name}\" has been moved to collection \"{parent_col.name}\"")
+        # move_to_collection already takes the whole hierarchy along.
+        self.move_to_collection(child_obj, parent_col)
+        if logger.isEnabledFor(logging.DEBUG):
+            for obj in self.get_hierarchy(child_obj):
+                logger.debug("[command] \"%s\" has been moved to collection \"%s\"", obj.name, parent_col.name)
         child_obj.parent = parent_obj
         return parent_obj
 
     def set_parent_by_select(self) -> bpy.types.Object:
         selected_objects = bpy.context.selected_objects
         if len(selected_objects) < 2:
-            print("[command] Please select at least 2 objects.")
+            logger.warning("[command] Please select at least 2 objects.")
             return
         parent_obj = bpy.context.active_object
         if parent_obj not in selected_objects:
-            print("[command] Please select the parent object.")
+            logger.warning("[command] Please select the parent object.")
             return
         for obj in selected_objects:
             if obj != parent_obj:
                 self.set_parent(parent_obj.name, obj.name)
-                print(f"[command] \"{obj.name}\" has been set parent to \"{parent_obj.name}\"")
+                logger.debug("[command] \"%s\" has been set parent to \"%s\"", obj.name, parent_obj.name)
         return parent_obj
 
     def add_object(self, name, type="EMPTY", parent=None) -> bpy.types.Object:
         bpy.ops.object.add(type=type)
         new_object = bpy.context.active_object
         new_object.name = name
+        if self.object_collections is not None and not bpy.context.collection.is_embedded_data:
+            self.object_collections[new_object] = [bpy.context.collection]
         if parent:
             self.set_parent(parent, new_object.name)
         return new_object
@@ -479,4 +693,5 @@ def main():
     # print(f"col_building: {col_building}")
 
 
-main()
+if __name__ == "__main__":
+    main()
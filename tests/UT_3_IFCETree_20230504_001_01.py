@@ -1,52 +1,269 @@
 import bpy
+import fnmatch
+import hashlib
+import json
+import multiprocessing
 import os
+import re
+import sys
+import tracemalloc
+import zipfile
+import numpy as np
+from array import array
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext
 from math import radians
+from bpy.app.handlers import persistent
 from mathutils import Euler
 
-os.system('cls')
+sys.path.append(os.path.dirname(os.path.realpath(__file__)))
+from bim_common import TransformSnapshot, batch_edit, batch_listeners, configure_logging, in_batch, max_rss_bytes
+import ifc_classify
+
+logger = configure_logging().getChild("ifc")
+
+
+class MemoryProfiler:
+    """Memory report per pipeline stage, for finding the stage that runs a big model out of memory.
+
+    Each stage() takes a tracemalloc snapshot on entry and exit and reads the process peak RSS.
+    The report holds the traced growth and peak, bytes per element, RSS growth, and the call
+    sites that allocated most, from Snapshot.compare_to. Pass one profiler to IFCParser (the
+    builder and ETree pick it up from there) and to XMLCreate.
+    """
+
+    def __init__(self, top: int = 10, frames: int = 1):
+        self.top = top
+        self.frames = frames
+        self.stages = []
+
+    @staticmethod
+    def snapshot() -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces((tracemalloc.Filter(False, tracemalloc.__file__),))
+
+    @contextmanager
+    def stage(self, name: str, elements: int = 0):
+        """Profile the with-block; the yielded dict takes "elements" if it is only known afterwards."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        tracemalloc.reset_peak()
+        before = self.snapshot()
+        rss_before = max_rss_bytes()
+        record = {"stage": name, "elements": elements}
+        try:
+            yield record
+        finally:
+            after = self.snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            stats = after.compare_to(before, "lineno")
+            growth = sum(stat.size_diff for stat in stats)
+            rss = max_rss_bytes()
+            record.update({
+                "traced_bytes": current,
+                "growth_bytes": growth,
+                "peak_bytes": peak,
+                "bytes_per_element": round(growth / record["elements"], 1) if record["elements"] else None,
+                "max_rss_bytes": rss,
+                "rss_growth_bytes": rss - rss_before if rss is not None else None,
+                "top": [{
+                    "site": str(stat.traceback),
+                    "size_diff": stat.size_diff,
+                    "count_diff": stat.count_diff
+                } for stat in stats[:self.top]]
+            })
+            self.stages.append(record)
+            logger.debug("[MemoryProfiler] %s: %+d bytes traced, peak %d.", name, growth, peak)
+
+    def stop(self):
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def to_json(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.stages, f, indent=4, ensure_ascii=False)
+
+    def table(self) -> str:
+        mib = 1024 * 1024
+        lines = [f"{'stage':<12}{'elements':>10}{'growth MiB':>12}{'peak MiB':>10}{'B/elem':>10}{'RSS MiB':>10}"]
+        for record in self.stages:
+            rss = record["max_rss_bytes"]
+            per_element = record["bytes_per_element"]
+            lines.append(f"{record['stage']:<12}{record['elements']:>10}{record['growth_bytes'] / mib:>12.2f}"
+                         f"{record['peak_bytes'] / mib:>10.2f}{per_element if per_element is not None else '-':>10}"
+                         f"{rss / mib if rss is not None else float('nan'):>10.1f}")
+            for top in record["top"][:3]:
+                lines.append(f"    {top['size_diff']:>+12d} B  {top['site']}")
+        return "\n".join(lines)
+
+
+def profile_stage(profiler, name: str, elements: int = 0):
+    return profiler.stage(name, elements) if profiler is not None else nullcontext({})
 
 
 class BlenderOperator:
+    # Collection membership of bpy.data.collections, shared by all instances. Built in one pass on
+    # first use and kept current by link / unlink / add_object / new_objects; call invalidate()
+    # after collections were edited any other way. The scene's master collection is not tracked.
+    object_collections = None
+
+    @classmethod
+    def membership(cls) -> dict:
+        if cls.object_collections is None:
+            object_collections = {}
+            for coll in bpy.data.collections:
+                for ob in coll.objects:
+                    object_collections.setdefault(ob, []).append(coll)
+            cls.object_collections = object_collections
+        return cls.object_collections
+
+    @classmethod
+    def invalidate(cls) -> None:
+        cls.object_collections = None
+
+    @classmethod
+    def link(cls, ob: bpy.types.Object, coll: bpy.types.Collection) -> None:
+        coll.objects.link(ob)
+        if cls.object_collections is not None and not coll.is_embedded_data:
+            cls.object_collections.setdefault(ob, []).append(coll)
+
+    @classmethod
+    def unlink(cls, ob: bpy.types.Object, coll: bpy.types.Collection) -> None:
+        coll.objects.unlink(ob)
+        if cls.object_collections is not None and not coll.is_embedded_data:
+            colls = cls.object_collections.get(ob)
+            if colls and coll in colls:
+                colls.remove(coll)
+
+    @classmethod
+    def get_object_collections(cls, ob: bpy.types.Object) -> list:
+        return cls.membership().get(ob, [])
+
+    @classmethod
+    def get_object_collection(cls, ob: bpy.types.Object) -> bpy.types.Collection:
+        colls = cls.membership().get(ob)
+        return colls[0] if colls else None
+
+    @staticmethod
+    def children_map(objects=None) -> dict:
+        # parent -> children in one pass; Object.children scans every object of the file on each call.
+        children = {}
+        for ob in bpy.data.objects if objects is None else objects:
+            if ob.parent is not None:
+                children.setdefault(ob.parent, []).append(ob)
+        return children
+
     @staticmethod
-    def get_object_collection(ob: bpy.types.Object) -> bpy.types.Collection:
-        return next((coll for coll in bpy.data.collections if ob.name in coll.objects), None)
+    def get_children(ob: bpy.types.Object, children: dict = None):
+        return children.get(ob, ()) if children is not None else ob.children
+
+    @classmethod
+    def iter_preorder(cls, ob: bpy.types.Object, children: dict = None):
+        """Yield ob and its descendants, each parent before its children, without recursion.
 
-    def get_object_children_recursive(self, ob: bpy.types.Object) -> list:
-        return [child for cur_ob in ob.children for child in [cur_ob] + self.get_object_children_recursive(cur_ob)]
+        children is an optional children_map() to walk instead of Object.children; the same applies
+        to iter_postorder and iter_breadth_first.
+        """
+        stack = [ob]
+        while stack:
+            cur_ob = stack.pop()
+            yield cur_ob
+            stack.extend(reversed(cls.get_children(cur_ob, children)))
+
+    @classmethod
+    def iter_postorder(cls, ob: bpy.types.Object, children: dict = None):
+        stack = [(ob, False)]
+        while stack:
+            cur_ob, expanded = stack.pop()
+            if expanded:
+                yield cur_ob
+                continue
+            stack.append((cur_ob, True))
+            stack.extend((child, False) for child in reversed(cls.get_children(cur_ob, children)))
+
+    @classmethod
+    def iter_breadth_first(cls, ob: bpy.types.Object, children: dict = None):
+        queue = deque([ob])
+        while queue:
+            cur_ob = queue.popleft()
+            yield cur_ob
+            queue.extend(cls.get_children(cur_ob, children))
+
+    @staticmethod
+    def get_object_children_recursive(ob: bpy.types.Object) -> list:
+        return list(ob.children_recursive)
 
     def get_object_hierarchy(self, ob: bpy.types.Object) -> list:
-        return [ob] + self.get_object_children_recursive(ob)
+        return [ob, *ob.children_recursive]
 
     def move_object(self, obj: bpy.types.Object, coll: bpy.types.Collection):
         hierarchy = self.get_object_hierarchy(obj)
         for obj in hierarchy:
-            for cur_coll in bpy.data.collections:
-                if obj.name in cur_coll.objects:
-                    cur_coll.objects.unlink(obj)
-            coll.objects.link(obj)
+            for cur_coll in list(self.get_object_collections(obj)):
+                self.unlink(obj, cur_coll)
+            self.link(obj, coll)
 
     def set_parent(self, child: bpy.types.Object, parent: bpy.types.Object, move: bool) -> bpy.types.Object:
-        if not parent or not child:
-            return
-        if move:
-            # print(f"[set_object_parent] Move \"{child}\" to \"{parent}\"")
-            coll = self.get_object_collection(parent)
-            hierarchy = self.get_object_hierarchy(child)
-            for ob in hierarchy:
-                # print(f"[set_object_parent] Move \"{ob}\" to \"{coll}\"")
-                if not coll:
-                    continue
-                self.move_object(ob, coll)
-        child.parent = parent
+        self.reparent_many([(child, parent)], move)
+
+    def reparent_many(self, pairs, move: bool = True) -> None:
+        """Parent every (child, parent) pair as set_parent would, in one batch.
+
+        The final collection of every object is planned first, following the parents and children
+        the earlier pairs give it. Each object is then unlinked and linked at most once and all the
+        parents are assigned in one sweep. A pair whose parent is the child or one of its descendants
+        at that point is refused, as Blender refuses the assignment, but still moves collections.
+        """
+        pairs = [(child, parent) for child, parent in pairs if child and parent]
+        parents = {}
+        targets = {}
+        # parent -> children as the pairs handled so far leave them, read from the file once:
+        # Object.children scans every object on each call.
+        children = {parent: dict.fromkeys(kids) for parent, kids in self.children_map().items()} if move else {}
+
+        def is_loop(child, parent):
+            while parent is not None:
+                if parent is child:
+                    return True
+                parent = parents.get(parent, parent.parent)
+            return False
+
+        for child, parent in pairs:
+            if move:
+                coll = targets.get(parent) or self.get_object_collection(parent)
+                if coll:
+                    for ob in self.iter_preorder(child, children):
+                        targets[ob] = coll
+            if is_loop(child, parent):
+                logger.debug("[reparent_many] \"%s\" is under \"%s\", parent not set.", parent.name, child.name)
+                continue
+            if move:
+                children.get(parents.get(child, child.parent), {}).pop(child, None)
+                children.setdefault(parent, {})[child] = None
+            parents[child] = parent
+
+        for ob, coll in targets.items():
+            current = self.get_object_collections(ob)
+            for cur_coll in [cur_coll for cur_coll in current if cur_coll != coll]:
+                self.unlink(ob, cur_coll)
+            linked = ob.name in coll.objects if coll.is_embedded_data else coll in current
+            if not linked:
+                self.link(ob, coll)
+        # Cleared first: in first-mention order an assignment could meet a loop that a later pair
+        # undoes, and the planned end state has none.
+        for child in parents:
+            child.parent = None
+        for child, parent in parents.items():
+            child.parent = parent
 
     def set_parent_by_select(self) -> bpy.types.Object:
         selected_objects = bpy.context.selected_objects
         if len(selected_objects) < 2:
-            print("[set_parent_by_select] Please select at least 2 objects.")
+            logger.warning("[set_parent_by_select] Please select at least 2 objects.")
             return
         parent_obj = bpy.context.active_object
         if parent_obj not in selected_objects:
-            print("[set_parent_by_select] Please select the parent object.")
+            logger.warning("[set_parent_by_select] Please select the parent object.")
             return
         for obj in selected_objects:
             if obj != parent_obj:
@@ -61,22 +278,27 @@ class BlenderOperator:
             if keep:
                 to_remove = to_remove[:-keep]
             for obj in to_remove:
-                print(f"Remove \"{obj.name}\" from \"{col.name}\"")
-                col.objects.unlink(obj)
-
-        def traverse(col):
-            reduce(col)
-            for child in col.children:
-                traverse(child)
+                logger.debug("[reduce_ifc_objects] Remove \"%s\" from \"%s\"", obj.name, col.name)
+                BlenderOperator.unlink(obj, col)
 
         if root_col not in bpy.data.collections:
-            print(f"[reduce_ifc_objects] Collection \"{root_col}\" not found.")
+            logger.warning("[reduce_ifc_objects] Collection \"%s\" not found.", root_col)
             return
-        traverse(bpy.data.collections.get(root_col))
+        root = bpy.data.collections.get(root_col)
+        for col in [root, *root.children_recursive]:
+            reduce(col)
 
     def add_object(self, name: str, type: str = 'EMPTY', parent: bpy.types.Object = None) -> bpy.types.Object:
-        bpy.ops.object.add(type=type)
-        new_object = bpy.context.object
+        if in_batch() and type == 'EMPTY':
+            # Same placement as object.add, without the view layer update the operator does first.
+            new_object = bpy.data.objects.new(name or "Empty", None)
+            new_object.location = bpy.context.scene.cursor.location
+            bpy.context.collection.objects.link(new_object)
+        else:
+            bpy.ops.object.add(type=type)
+            new_object = bpy.context.object
+        if self.object_collections is not None and not bpy.context.collection.is_embedded_data:
+            self.object_collections[new_object] = [bpy.context.collection]
         if name:
             new_object.name = name
         if parent:
@@ -85,43 +307,499 @@ class BlenderOperator:
         return new_object
 
     @staticmethod
-    def set_location(obj: str, location: tuple) -> None:
-        obj = bpy.data.objects.get(obj)
+    def new_objects(names, coll: bpy.types.Collection, data=None) -> dict:
+        # bpy.data instead of bpy.ops: no operator call, context lookup or view layer update per object.
+        objects = {name: bpy.data.objects.new(name, data) for name in names}
+        for ob in objects.values():
+            BlenderOperator.link(ob, coll)
+        return objects
+
+    @staticmethod
+    def set_location(name: str, location: tuple) -> None:
+        obj = bpy.data.objects.get(name)
         if not obj:
-            print(f"[set_location] Object {obj} not found")
+            logger.warning("[set_location] Object %s not found", name)
             return
         obj.location = location
 
     @staticmethod
-    def set_rotation(obj, rotation, use_degree=False):
-        obj = bpy.data.objects.get(obj)
+    def set_rotation(name, rotation, use_degree=False):
+        obj = bpy.data.objects.get(name)
         if not obj:
-            print(f"[set_location] Object {obj} not found")
+            logger.warning("[set_rotation] Object %s not found", name)
             return
         if use_degree:
             rotation = tuple(radians(angle) for angle in rotation)
         obj.rotation_euler = Euler(rotation)
 
     @staticmethod
-    def set_scale(obj, scale):
-        obj = bpy.data.objects.get(obj)
+    def set_scale(name, scale):
+        obj = bpy.data.objects.get(name)
         if not obj:
-            print(f"[set_location] Object {obj} not found")
+            logger.warning("[set_scale] Object %s not found", name)
             return
         obj.scale = scale
 
 
+IfcName = namedtuple("IfcName", ["ifc_class", "name", "base", "suffix"])
+"""`Ifc<Class>/<Name>` split once: name is the text after the first "/" as before, base is name
+without Blender's duplicate suffix (".001") and suffix that suffix, or "" if there is none."""
+
+
+class IFCRecord:
+    """One parsed object. Item access keeps the old ifc_info dict interface working."""
+
+    __slots__ = ("bl_type", "ifc_parent", "ifc_type", "ifc_project", "ifc_site", "ifc_building", "ifc_storey",
+                 "transform", "ifc_inst")
+
+    def __init__(self, bl_type, ifc_parent, token: IfcName, transform):
+        ifc_class, name = token.ifc_class, token.name
+        self.bl_type = bl_type
+        self.ifc_parent = ifc_parent
+        self.ifc_type = ifc_class
+        self.ifc_project = name if ifc_class == "IfcProject" else None
+        self.ifc_site = name if ifc_class == "IfcSite" else None
+        self.ifc_building = name if ifc_class == "IfcBuilding" else None
+        self.ifc_storey = name if ifc_class == "IfcBuildingStorey" else None
+        self.transform = transform
+        self.ifc_inst = None
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __setitem__(self, key, value):
+        try:
+            setattr(self, key, value)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def keys(self):
+        return self.__slots__
+
+    def items(self):
+        return [(key, getattr(self, key)) for key in self.__slots__]
+
+    def __repr__(self):
+        return f"<IFCRecord {dict(self.items())}>"
+
+
+class IFCCategory:
+    """Categorical column: one int code per row, every distinct (interned) value stored once."""
+
+    def __init__(self):
+        self.values = [None]
+        self.lookup = {None: 0}
+        self.codes = array("i")
+
+    def __getitem__(self, row: int):
+        return self.values[self.codes[row]]
+
+    def code(self, value) -> int:
+        code = self.lookup.get(value)
+        if code is None:
+            code = self.lookup[value] = len(self.values)
+            self.values.append(sys.intern(value) if isinstance(value, str) else value)
+        return code
+
+    def append(self, value) -> None:
+        self.codes.append(self.code(value))
+
+    def extend(self, values: list, codes: np.ndarray) -> None:
+        """Append codes given against their own values table, as ifc_classify.classify_chunk returns them."""
+        remap = np.fromiter((self.code(value) for value in values), dtype=np.intc, count=len(values))
+        self.codes.frombytes(remap[codes].tobytes())
+
+
+class IFCInfo:
+    """Columnar (struct of arrays) result of IFCParser.read_ifc.
+
+    Rows are appended as IFCRecord and then frozen: parents become row indices (-1 for none) and
+    transforms (N, 3) float arrays gathered from the TransformSnapshot. Indexing by object name
+    returns a Row that reads like the old per-object dict, so IFCBuilder and IFCETree keep using
+    ifc_info[name]["ifc_inst"] and friends.
+    """
+
+    categories = ("bl_type", "ifc_type", "ifc_project", "ifc_site", "ifc_building", "ifc_storey")
+
+    class Row:
+        __slots__ = ("info", "row")
+
+        def __init__(self, info, row: int):
+            self.info = info
+            self.row = row
+
+        def __getitem__(self, key):
+            info, row = self.info, self.row
+            if key in info.columns:
+                return info.columns[key][row]
+            if key == "ifc_parent":
+                return info.parent_name(row)
+            if key == "ifc_inst":
+                return info.ifc_inst[row]
+            if key == "transform":
+                return info.transform(row)
+            raise KeyError(key)
+
+        def __setitem__(self, key, value):
+            if key != "ifc_inst":
+                raise KeyError(key)
+            self.info.ifc_inst[self.row] = value
+
+        def get(self, key, default=None):
+            try:
+                return self[key]
+            except KeyError:
+                return default
+
+        def __repr__(self):
+            return f"<IFCInfo.Row '{self.info.names[self.row]}'>"
+
+    def __init__(self):
+        self.names = []
+        self.rows = {}
+        self.columns = {key: IFCCategory() for key in self.categories}
+        self.parent = np.empty(0, dtype=np.int32)
+        self.external_parents = {}
+        self.position = np.empty((0, 3), dtype=np.float32)
+        self.rotation = np.empty((0, 3), dtype=np.float32)
+        self.scale = np.empty((0, 3), dtype=np.float32)
+        self.ifc_inst = []
+        self.pending_parents = []
+
+    def clear(self) -> None:
+        self.__init__()
+
+    def append(self, name: str, record: IFCRecord) -> None:
+        self.append_row(name, [getattr(record, key) for key in self.categories], record.ifc_parent)
+
+    def append_row(self, name: str, values, ifc_parent) -> None:
+        # values in self.categories order.
+        self.rows[name] = len(self.names)
+        self.names.append(name)
+        for key, value in zip(self.categories, values):
+            self.columns[key].append(value)
+        self.pending_parents.append(ifc_parent)
+        self.ifc_inst.append(None)
+
+    def freeze(self, transforms: TransformSnapshot) -> None:
+        count = len(self.names)
+        self.parent = np.full(count, -1, dtype=np.int32)
+        for row, parent in enumerate(self.pending_parents):
+            if parent is None:
+                continue
+            if parent in self.rows:
+                self.parent[row] = self.rows[parent]
+            else:
+                # A parent collection without an Empty of its own name has no row.
+                self.external_parents[row] = parent
+        self.pending_parents = []
+        self.gather_transforms(transforms)
+
+    def merge_chunks(self, names: list, chunks: list, collections: list) -> None:
+        """Fill from ifc_classify.classify_chunk results instead of append_row + freeze.
+
+        names are the chunks' names in order, collections the names the parent indices refer to.
+        Transforms are not read here; call gather_transforms afterwards, as freeze does.
+        """
+        self.clear()
+        self.names = names
+        self.rows = dict(zip(names, range(len(names))))
+        self.ifc_inst = [None] * len(names)
+        for codes, values, _ in chunks:
+            for i, column in enumerate(self.columns.values()):
+                column.extend(values[i], codes[i])
+        # A trailing -1 so that index -1 (no parent) reads as no row.
+        collection_rows = np.array([self.rows.get(name, -1) for name in collections] + [-1], dtype=np.int32)
+        collection_index = np.concatenate([parent for _, _, parent in chunks]) if chunks else np.empty(0, np.int32)
+        self.parent = collection_rows[collection_index]
+        # A parent collection without an Empty of its own name has no row.
+        external = np.flatnonzero((collection_index >= 0) & (self.parent < 0))
+        self.external_parents = {row: collections[collection_index[row]] for row in external.tolist()}
+
+    def gather_transforms(self, transforms: TransformSnapshot) -> None:
+        count = len(self.names)
+        index = np.fromiter((transforms.index[name] for name in self.names), dtype=np.intp, count=count)
+        self.position = transforms.position[index]
+        self.rotation = transforms.rotation[index]
+        self.scale = transforms.scale[index]
+
+    def update_transforms(self, transforms: TransformSnapshot) -> None:
+        # Objects of transforms without a row are skipped.
+        pairs = [(self.rows[name], i) for i, name in enumerate(transforms.names) if name in self.rows]
+        if not pairs:
+            return
+        rows, source = np.array(pairs, dtype=np.intp).T
+        self.position[rows] = transforms.position[source]
+        self.rotation[rows] = transforms.rotation[source]
+        self.scale[rows] = transforms.scale[source]
+
+    def parent_first(self) -> list:
+        """Row indices ordered so that every row comes after its parent row (depth first)."""
+        children = {}
+        order = []
+        stack = []
+        for row, parent in enumerate(self.parent.tolist()):
+            if parent < 0:
+                stack.append(row)
+            else:
+                children.setdefault(parent, []).append(row)
+        stack.reverse()
+        while stack:
+            row = stack.pop()
+            order.append(row)
+            stack.extend(reversed(children.get(row, ())))
+        if len(order) != len(self.names):
+            logger.warning("[IFCInfo] %d rows are in a parent cycle and were left out.", len(self.names) - len(order))
+        return order
+
+    def parent_name(self, row: int) -> str:
+        parent = self.parent[row]
+        if parent >= 0:
+            return self.names[parent]
+        return self.external_parents.get(row)
+
+    def transform(self, row: int) -> dict:
+        return {
+            "position": tuple(self.position[row].tolist()),
+            "rotation": tuple(self.rotation[row].tolist()),
+            "scale": tuple(self.scale[row].tolist())
+        }
+
+    @staticmethod
+    def pack_strings(strings: list) -> np.ndarray:
+        return np.frombuffer("\0".join(strings).encode("utf-8"), dtype=np.uint8)
+
+    @staticmethod
+    def unpack_strings(packed: np.ndarray, count: int) -> list:
+        if not count:
+            return []
+        return [sys.intern(string) for string in packed.tobytes().decode("utf-8").split("\0")]
+
+    def to_arrays(self) -> dict:
+        arrays = {
+            "names": self.pack_strings(self.names),
+            "count": np.array(len(self.names)),
+            "parent": self.parent,
+            "external_rows": np.fromiter(self.external_parents.keys(), dtype=np.int32),
+            "external_names": self.pack_strings(list(self.external_parents.values())),
+            "position": self.position,
+            "rotation": self.rotation,
+            "scale": self.scale
+        }
+        for key, column in self.columns.items():
+            arrays[f"{key}_codes"] = np.frombuffer(column.codes, dtype=np.intc)
+            arrays[f"{key}_values"] = self.pack_strings(column.values[1:])
+            arrays[f"{key}_count"] = np.array(len(column.values) - 1)
+        return arrays
+
+    def load_arrays(self, arrays) -> None:
+        self.clear()
+        self.names = self.unpack_strings(arrays["names"], int(arrays["count"]))
+        self.rows = {name: row for row, name in enumerate(self.names)}
+        self.parent = arrays["parent"]
+        external_rows = arrays["external_rows"].tolist()
+        self.external_parents = dict(zip(external_rows, self.unpack_strings(arrays["external_names"],
+                                                                           len(external_rows))))
+        self.position = arrays["position"]
+        self.rotation = arrays["rotation"]
+        self.scale = arrays["scale"]
+        self.ifc_inst = [None] * len(self.names)
+        for key, column in self.columns.items():
+            column.values = [None] + self.unpack_strings(arrays[f"{key}_values"], int(arrays[f"{key}_count"]))
+            column.lookup = {value: code for code, value in enumerate(column.values)}
+            column.codes = array("i", arrays[f"{key}_codes"].astype(np.intc).tobytes())
+
+    def to_dicts(self) -> dict:
+        # The former dict-of-dicts layout, for comparisons and debugging.
+        keys = self.categories + ("ifc_parent", "transform", "ifc_inst")
+        return {name: {key: self[name][key] for key in keys} for name in self.names}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __contains__(self, name) -> bool:
+        return name in self.rows
+
+    def __getitem__(self, name: str) -> Row:
+        return self.Row(self, self.rows[name])
+
+    def get(self, name: str, default=None):
+        row = self.rows.get(name)
+        return default if row is None else self.Row(self, row)
+
+    def keys(self) -> list:
+        return self.names
+
+    def values(self):
+        return (self.Row(self, row) for row in range(len(self.names)))
+
+    def items(self):
+        return ((name, self.Row(self, row)) for row, name in enumerate(self.names))
+
+
+class IFCParseCache:
+    """IFCParser results stored next to the .blend as an .npz of the IFCInfo columns.
+
+    The file is keyed by a fingerprint of the IFC collection tree: collection names, their children
+    and objects in order, and the world matrices of the parsed objects. Any rename, membership
+    change or transform edit gives another fingerprint and the cache is parsed again.
+    """
+
+    version = 1
+
+    def __init__(self, path: str = None):
+        if path is None and bpy.data.filepath:
+            path = bpy.data.filepath + ".ifccache"
+        self.path = path
+
+    @staticmethod
+    def fingerprint(parser, transforms: TransformSnapshot) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(parser.root.name.encode("utf-8"))
+        for coll_name, coll in parser.ifc_collections.items():
+            digest.update("\1".join([coll_name, *coll.children.keys(), "\2", *coll.objects.keys()]).encode("utf-8"))
+            digest.update(b"\3")
+        digest.update("\1".join(parser.ifc_objects).encode("utf-8"))
+        index = np.fromiter((transforms.index[name] for name in parser.ifc_objects), dtype=np.intp,
+                            count=len(parser.ifc_objects))
+        digest.update(transforms.matrices[index].tobytes())
+        return digest.hexdigest()
+
+    def load(self, info: IFCInfo, fingerprint: str) -> bool:
+        if not self.path or not os.path.exists(self.path):
+            return False
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                if int(data["version"]) != self.version or str(data["fingerprint"]) != fingerprint:
+                    return False
+                info.load_arrays(data)
+        except (OSError, KeyError, ValueError, EOFError, zipfile.BadZipFile) as e:
+            logger.warning("[IFCParseCache] \"%s\" could not be read: %s", self.path, e)
+            return False
+        return True
+
+    def save(self, info: IFCInfo, fingerprint: str) -> None:
+        if not self.path:
+            return
+        # A crash mid-write must not leave a truncated cache behind, so replace the file only when complete.
+        part_path = f"{self.path}.part"
+        try:
+            with open(part_path, "wb") as f:
+                np.savez(f, version=np.array(self.version), fingerprint=np.array(fingerprint), **info.to_arrays())
+            os.replace(part_path, self.path)
+        finally:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+
+
+@contextmanager
+def detached_main():
+    """Hide __main__.__file__ while spawning workers.
+
+    A spawned child re-runs the parent's main script to rebuild its globals, and this script
+    imports bpy, which the plain Python interpreter Blender spawns does not have. The worker
+    functions live in their own module, so the child never needs the main script.
+    """
+    main = sys.modules["__main__"]
+    main_file = main.__dict__.pop("__file__", None)
+    try:
+        yield
+    finally:
+        if main_file is not None:
+            main.__file__ = main_file
+
+
+class IFCRules:
+    """Include / exclude rules for IFCParser.sorting, compiled once per parser.
+
+    collections are name globs and take the whole subtree of a matching collection, classes
+    are the IFC class part of an object name, properties map a custom property to the value
+    it must have (None for any value). Include rules narrow the elements only: the spatial
+    collections above an included subtree, and their own Empties, always stay.
+    """
+
+    def __init__(self, include_collections=(), include_classes=(), include_properties=None,
+                 exclude_collections=(), exclude_classes=(), exclude_properties=None):
+        self.include_collections = self.compile_globs(include_collections)
+        self.include_classes = frozenset(include_classes)
+        self.include_properties = dict(include_properties or {})
+        self.exclude_collections = self.compile_globs(exclude_collections)
+        self.exclude_classes = frozenset(exclude_classes)
+        self.exclude_properties = dict(exclude_properties or {})
+
+    @staticmethod
+    def compile_globs(globs):
+        if not globs:
+            return None
+        return re.compile("|".join(fnmatch.translate(glob) for glob in globs))
+
+    @property
+    def filters_objects(self) -> bool:
+        return bool(self.include_classes or self.include_properties or
+                    self.exclude_classes or self.exclude_properties)
+
+    def excludes_collection(self, name: str) -> bool:
+        return self.exclude_collections is not None and self.exclude_collections.match(name) is not None
+
+    def includes_collection(self, name: str) -> bool:
+        return self.include_collections is None or self.include_collections.match(name) is not None
+
+    @staticmethod
+    def match_property(ob, properties: dict):
+        for key, value in properties.items():
+            if key in ob and (value is None or ob[key] == value):
+                return key
+        return None
+
+    def reject(self, name: str, ob):
+        """None to keep the object, "" to leave it out, otherwise the exclude rule that matched."""
+        ifc_class = name.partition("/")[0]
+        if ifc_class in self.exclude_classes:
+            return ifc_class
+        key = self.exclude_properties and self.match_property(ob, self.exclude_properties)
+        if key:
+            return key
+        if not (self.include_classes or self.include_properties):
+            return None
+        if ifc_class in self.include_classes:
+            return None
+        if self.include_properties and self.match_property(ob, self.include_properties):
+            return None
+        return ""
+
+
 class IFCParser:
-    def __init__(self, root="IfcBuilding/"):
+    def __init__(self, root="IfcBuilding/", cache: bool = False, workers: int = 0, rules: IFCRules = None,
+                 storeys=None, classes=None, max_depth: int = None, profiler: MemoryProfiler = None):
         self.root = bpy.data.collections.get(root)
-        self.ifc_objects = {**self.root.all_objects}
-        self.ifc_collections = {self.root.name: self.root} | {coll.name: coll for coll in
-                                                              self.root.children_recursive}
-        self.ifc_info = {}
         self.ifc_extra_list = ["Views", "Types", "StructuralItems", "Members", "Connections"]
         self.ifc_extra_collections = {}
-        self.ifc_extra_objects = {}
+        # Objects left out by class or property rules; see ifc_extra_objects.
+        self.extra_objects = {}
         self.ifc_extra = {}
+        self.rules = rules or IFCRules(exclude_collections=self.ifc_extra_list)
+        self.ifc_collections, self.ifc_objects = self.gather(storeys, classes, max_depth)
+        # Root and filters of this parse, stored on the built instances; see IFCBuilder.resync.
+        storeys = self.storey_names(storeys)
+        self.scope = json.dumps([root, sorted(storeys) if storeys is not None else None,
+                                 sorted(classes) if classes else None, max_depth])
+        self.ifc_info = IFCInfo()
+        self.ifc_parents = {}
+        self.transforms = None
+        self.cache = IFCParseCache() if cache else None
+        # > 0 classifies names in that many worker processes, see read_ifc_parallel.
+        self.workers = workers
+        self.chunk_size = 20000
+        self.profiler = profiler
 
         self.is_executed = False
 
@@ -129,106 +807,432 @@ class IFCParser:
     def get_names(source):
         return [ob.name for ob in source]
 
+    @staticmethod
+    def storey_names(storeys) -> set:
+        if storeys is None:
+            return None
+        return {name if name.startswith("IfcBuildingStorey/") else "IfcBuildingStorey/" + name for name in storeys}
+
+    def gather(self, storeys=None, classes=None, max_depth: int = None):
+        """Collect the collections and objects under root, visiting only the subtrees in scope.
+
+        storeys: IfcBuildingStorey names ("1F" or "IfcBuildingStorey/1F"); other storeys are not
+        entered, and outside the chosen storeys only the collections' own Empties are kept.
+        classes: IFC class prefixes ("IfcWall", "IfcDoor"); collection Empties are always kept.
+        max_depth: collection levels below root to enter, root being 0.
+        Collections excluded by self.rules are recorded in ifc_extra_collections and not entered,
+        so their objects are never visited.
+        Without filters this is root + children_recursive and root.all_objects, in the same order.
+        """
+        storeys = self.storey_names(storeys)
+        classes = tuple(classes) if classes else None
+        collections = {}
+        objects = {}
+        stack = [(self.root, 0, storeys is None)]
+        while stack:
+            coll, depth, in_scope = stack.pop()
+            coll_name = coll.name
+            if coll_name in collections or coll_name in self.ifc_extra_collections:
+                continue
+            if self.rules.excludes_collection(coll_name):
+                self.ifc_extra_collections[coll_name] = {coll_name: coll} | {
+                    child.name: child for child in coll.children_recursive}
+                continue
+            if storeys is not None and coll_name.startswith("IfcBuildingStorey/"):
+                in_scope = coll_name in storeys
+                if not in_scope:
+                    continue
+            collections[coll_name] = coll
+            if in_scope:
+                for ob in coll.objects:
+                    name = ob.name
+                    if name not in objects and (classes is None or name == coll_name or name.startswith(classes)):
+                        objects[name] = ob
+            else:
+                ob = coll.objects.get(coll_name)
+                if ob is not None:
+                    objects.setdefault(coll_name, ob)
+            if max_depth is None or depth < max_depth:
+                stack.extend((child, depth + 1, in_scope) for child in list(coll.children)[::-1])
+        return collections, objects
+
+    @property
+    def ifc_extra_objects(self) -> dict:
+        """Left-out objects under the excluded collection or the class / property rule that matched.
+
+        gather does not enter excluded collections, so their objects are only listed here, on first
+        access.
+        """
+        for coll_name, subtree in self.ifc_extra_collections.items():
+            if coll_name not in self.extra_objects:
+                self.extra_objects[coll_name] = {ob.name: {ob.name: ob} for ob in subtree[coll_name].all_objects}
+        return self.extra_objects
+
     def sorting(self):
-        for extra in self.ifc_extra_list:
-            if extra in self.ifc_collections.keys():
-                pop_coll = self.ifc_collections.pop(extra)
-                self.ifc_extra_collections[extra] = {pop_coll.name: pop_coll}
-
-                ob_dict = {}
-                for ob in pop_coll.all_objects:
-                    pop_ob = self.ifc_objects.pop(ob.name)
-                    ob_dict[ob.name] = {pop_ob.name: pop_ob}
-                self.ifc_extra_objects[extra] = ob_dict
-
-    def read_ifc(self):
-        self.ifc_info[self.root.name] = None
-        for ob in self.ifc_objects.keys():
-            self.ifc_info[ob] = {
-                "bl_type": self.define_bl_type(ob),
-                "ifc_parent": self.define_ifc_parent(ob),
-                "ifc_type": self.define_ifc_type(ob),
-                "ifc_project": self.define_ifc_project(ob),
-                "ifc_site": self.define_ifc_site(ob),
-                "ifc_building": self.define_ifc_building(ob),
-                "ifc_storey": self.define_ifc_storey(ob),
-                "transform": self.define_transform(ob),
-            }
+        """Apply self.rules to what gather kept: include globs, then object filters in one pass.
+
+        Excluded collections were already pruned by gather. Objects excluded by class or property
+        end up in ifc_extra_objects under the rule that matched them.
+        """
+        rules = self.rules
+        dropped = set()
+        collections = self.ifc_collections
+        if rules.include_collections is not None:
+            collections, scope = self.scope_collections(collections)
+            dropped.update(self.ifc_objects.keys() - scope)
+        self.ifc_collections = collections
+
+        if rules.filters_objects:
+            for name, ob in self.ifc_objects.items():
+                if name in dropped or name in collections:
+                    continue
+                rule = rules.reject(name, ob)
+                if rule is None:
+                    continue
+                dropped.add(name)
+                if rule:
+                    self.extra_objects.setdefault(rule, {})[name] = {name: ob}
+        if dropped:
+            self.ifc_objects = {name: ob for name, ob in self.ifc_objects.items() if name not in dropped}
+
+    def scope_collections(self, collections: dict):
+        """Collections kept by the include globs, with their ancestors, and the object names in scope."""
+        parents = {}
+        for coll_name, coll in collections.items():
+            for child in coll.children.keys():
+                parents.setdefault(child, coll_name)
+        keep = set()
+        spine = set()
+        objects = set()
+        for coll_name, coll in collections.items():
+            if coll_name in keep or not self.rules.includes_collection(coll_name):
+                continue
+            keep.add(coll_name)
+            keep.update(child.name for child in coll.children_recursive)
+            objects.update(coll.all_objects.keys())
+            parent = parents.get(coll_name)
+            while parent is not None and parent not in spine:
+                spine.add(parent)
+                parent = parents.get(parent)
+        # Above the included subtrees only the collections' own Empties are kept.
+        objects.update(spine)
+        return {name: coll for name, coll in collections.items() if name in keep or name in spine}, objects
+
+    def capture_transforms(self) -> TransformSnapshot:
+        # Only the parsed collections: a one-storey parse does not pay for the rest of the file.
+        return TransformSnapshot.from_collections(self.ifc_collections.values())
+
+    def index_parents(self):
+        # Same answer as scanning the collections in order: the first collection listing a name wins.
+        self.ifc_parents = {}
+        for coll_name, coll in self.ifc_collections.items():
+            for child in coll.children.keys():
+                self.ifc_parents.setdefault(child, coll_name)
+            for ob in coll.objects.keys():
+                self.ifc_parents.setdefault(ob, None if ob == coll_name else coll_name)
+
+    def ordered_names(self) -> list:
+        names = list(self.ifc_objects.keys())
+        if self.root.name in self.ifc_objects:
+            # The root came first when ifc_info was a dict seeded with it.
+            names.remove(self.root.name)
+            names.insert(0, self.root.name)
+        return names
+
+    def read_ifc(self, transforms: TransformSnapshot = None):
+        if self.workers > 0:
+            return self.read_ifc_parallel(transforms)
+        self.index_parents()
+        self.transforms = transforms or self.capture_transforms()
+        self.ifc_info.clear()
+        for ob in self.ordered_names():
+            self.ifc_info.append(ob, IFCRecord(
+                self.define_bl_type(ob),
+                self.define_ifc_parent(ob),
+                self.tokenize(ob),
+                None
+            ))
+        self.ifc_info.freeze(self.transforms)
+
+    def read_ifc_parallel(self, transforms: TransformSnapshot = None):
+        """read_ifc with tokenizing and parent lookup farmed out to a process pool.
+
+        Only plain data crosses the process boundary: the collection names once per worker, and
+        per chunk its object names with their parent collection names. Chunks come back as arrays
+        and are merged with np.concatenate, so this process does no per-row classification work.
+        Everything touching bpy (the names, the transforms) stays in this process.
+        """
+        self.index_parents()
+        self.transforms = transforms or self.capture_transforms()
+        collections = list(self.ifc_collections.keys())
+        names = self.ordered_names()
+        parents = self.ifc_parents
+        chunks = [(chunk, [parents.get(name) for name in chunk])
+                  for chunk in (names[i:i + self.chunk_size] for i in range(0, len(names), self.chunk_size))]
+        context = multiprocessing.get_context("spawn")
+        with detached_main(), ProcessPoolExecutor(self.workers, mp_context=context,
+                                                  initializer=ifc_classify.init_worker,
+                                                  initargs=(collections,)) as pool:
+            results = list(pool.map(ifc_classify.classify_chunk, chunks))
+        self.ifc_info.merge_chunks(names, results, collections)
+        self.ifc_info.gather_transforms(self.transforms)
+        logger.debug("Classified %d names in %d chunks on %d workers.", len(names), len(chunks), self.workers)
 
     def define_bl_type(self, ob: str):
-        if ob in self.ifc_collections.keys():
-            return type(bpy.data.collections.get(ob)).__name__
-        return type(bpy.data.objects.get(ob)).__name__
+        if ob in self.ifc_collections:
+            return type(self.ifc_collections[ob]).__name__
+        return type(self.ifc_objects[ob]).__name__
 
     def define_ifc_parent(self, ob: str):
-        for coll in self.ifc_collections.keys():
-            if ob in bpy.data.collections[coll].children.keys():
-                return coll
-            if ob in bpy.data.collections[coll].objects.keys():
-                if ob == coll:
-                    return None
-                return coll
+        return self.ifc_parents.get(ob)
+
+    @staticmethod
+    def tokenize(obj: str) -> IfcName:
+        if not obj.startswith("Ifc"):
+            return IfcName(None, None, None, None)
+        head, sep, rest = obj.partition("/")
+        ifc_class = sys.intern(head)
+        if not sep:
+            return IfcName(ifc_class, None, None, None)
+        name = rest.partition("/")[0]
+        base, dot, digits = name.rpartition(".")
+        if dot and len(digits) >= 3 and digits.isdigit():
+            return IfcName(ifc_class, name, base, dot + digits)
+        return IfcName(ifc_class, name, name, "")
 
     @staticmethod
     def define_ifc_type(obj):
-        if obj.startswith("Ifc"):
-            return obj.split("/")[0]
+        return IFCParser.tokenize(obj).ifc_class
 
     @staticmethod
     def define_ifc_project(obj):
-        if obj.startswith("IfcProject/"):
-            return obj.split("/")[1]
+        return IFCRecord(None, None, IFCParser.tokenize(obj), None).ifc_project
 
     @staticmethod
     def define_ifc_site(obj):
-        if obj.startswith("IfcSite/"):
-            return obj.split("/")[1]
+        return IFCRecord(None, None, IFCParser.tokenize(obj), None).ifc_site
 
     @staticmethod
     def define_ifc_building(obj):
-        if obj.startswith("IfcBuilding/"):
-            return obj.split("/")[1]
+        return IFCRecord(None, None, IFCParser.tokenize(obj), None).ifc_building
 
     @staticmethod
     def define_ifc_storey(obj):
-        if obj.startswith("IfcBuildingStorey/"):
-            return obj.split("/")[1]
+        return IFCRecord(None, None, IFCParser.tokenize(obj), None).ifc_storey
 
-    @staticmethod
-    def define_transform(obj):
-        obj = bpy.data.objects[obj]
-        transform = {
-            "position": (
-                obj.matrix_world.to_translation().x,
-                obj.matrix_world.to_translation().y,
-                obj.matrix_world.to_translation().z
-            ),
-            "rotation": (
-                obj.matrix_world.to_euler().x,
-                obj.matrix_world.to_euler().y,
-                obj.matrix_world.to_euler().z
-            ),
-            "scale": (
-                obj.matrix_world.to_scale().x,
-                obj.matrix_world.to_scale().y,
-                obj.matrix_world.to_scale().z
-            )
-        }
-        return transform
+    def define_transform(self, ob: str):
+        return self.transforms.get(ob)
+
+    def iter_records(self):
+        """Yield (name, IFCRecord) one object at a time, each parent before its children.
+
+        Collections are visited in the same order index_parents uses, so every record gets the
+        parent read_ifc would give it, and a collection's own Empty is yielded before the rest of
+        its objects. Nothing is added to ifc_info.
+        """
+        self.is_executed = True
+        self.sorting()
+        self.transforms = self.capture_transforms()
+        parents = {}
+        seen = set()
+        for coll_name, coll in self.ifc_collections.items():
+            for child in coll.children.keys():
+                parents.setdefault(child, coll_name)
+            names = coll.objects.keys()
+            if coll_name in names:
+                names.remove(coll_name)
+                names.insert(0, coll_name)
+            for ob in names:
+                if ob in seen or ob not in self.ifc_objects:
+                    continue
+                seen.add(ob)
+                parent = parents[ob] if ob in parents else None if ob == coll_name else coll_name
+                yield ob, IFCRecord(self.define_bl_type(ob), parent, self.tokenize(ob), self.define_transform(ob))
 
     def execute(self):
         self.is_executed = True
+        with profile_stage(self.profiler, "IFCParser", len(self.ifc_objects)):
+            self.parse()
 
+    def parse(self):
         self.sorting()
-        print("IFC extra elements has been picked up.")
-        self.read_ifc()
-        print("IFC elements has been parsed.")
+        logger.info("IFC extra elements has been picked up.")
+        if not self.cache:
+            self.read_ifc()
+            logger.info("IFC elements has been parsed.")
+            return
+        self.transforms = self.capture_transforms()
+        fingerprint = IFCParseCache.fingerprint(self, self.transforms)
+        if self.cache.load(self.ifc_info, fingerprint):
+            logger.info("IFC elements has been loaded from \"%s\".", self.cache.path)
+            return
+        self.read_ifc(self.transforms)
+        self.cache.save(self.ifc_info, fingerprint)
+        logger.info("IFC elements has been parsed and cached.")
+
+
+class IFCLiveIndex:
+    """Opt-in IFCParser result kept current while the scene is being edited.
+
+    depsgraph_update_post collects the objects of the parser's transform snapshot that the
+    depsgraph reports as moved (rows and the Empties XMLCreate reads alike), and only their
+    transforms are re-read. A change to one of the parsed collections (objects linked, unlinked
+    or deleted) or a rename seen on the msgbus marks the parse stale, and the next access to
+    .parser parses again. Exporters take .parser instead of running their own.
+    Inside a batch_edit the handler only notes that it missed updates, and the parse is marked
+    stale when the batch ends.
+
+    The handlers are persistent module functions serving every registered index, so they survive
+    File > Open; load_post drops the old file's parse and subscribes to the msgbus again, which
+    the load cleared.
+    """
+
+    registered = []
+
+    def __init__(self, root="IfcBuilding/", **options):
+        self.root = root
+        self.options = options
+        self.current = None
+        self.stale = True
+        self.moved = set()
+        self.missed = False
+        self.owner = object()
+        self.is_registered = False
+
+    def register(self):
+        if self.is_registered:
+            return
+        if not IFCLiveIndex.registered:
+            bpy.app.handlers.depsgraph_update_post.append(live_index_depsgraph_update)
+            bpy.app.handlers.load_post.append(live_index_load_post)
+        IFCLiveIndex.registered.append(self)
+        self.subscribe()
+        batch_listeners.append(self.on_batch_end)
+        self.is_registered = True
+
+    def unregister(self):
+        if self in IFCLiveIndex.registered:
+            IFCLiveIndex.registered.remove(self)
+        if not IFCLiveIndex.registered:
+            for handlers, handler in ((bpy.app.handlers.depsgraph_update_post, live_index_depsgraph_update),
+                                      (bpy.app.handlers.load_post, live_index_load_post)):
+                if handler in handlers:
+                    handlers.remove(handler)
+        bpy.msgbus.clear_by_owner(self.owner)
+        if self.on_batch_end in batch_listeners:
+            batch_listeners.remove(self.on_batch_end)
+        self.is_registered = False
+
+    def subscribe(self):
+        for key in ((bpy.types.Object, "name"), (bpy.types.Collection, "name")):
+            bpy.msgbus.subscribe_rna(key=key, owner=self.owner, args=(), notify=self.on_rename)
+
+    def on_load_post(self):
+        # The previous file's parse holds references to freed data.
+        self.current = None
+        self.stale = True
+        self.moved.clear()
+        self.missed = False
+        self.subscribe()
+
+    def on_rename(self, *args):
+        # The msgbus does not say which ID was renamed, and names carry the IFC tokens.
+        self.stale = True
+
+    def on_batch_end(self):
+        # Edits only reported before the batch ended may have touched the parsed collections.
+        if self.missed:
+            self.stale = True
+            self.missed = False
+
+    def on_depsgraph_update(self, scene, depsgraph):
+        if self.stale or self.current is None:
+            return
+        if in_batch():
+            self.missed = True
+            return
+        tracked = self.current.transforms if self.current.transforms is not None else self.current.ifc_info.rows
+        for update in depsgraph.updates:
+            data = update.id.original
+            if isinstance(data, bpy.types.Collection):
+                if data.name in self.current.ifc_collections:
+                    self.stale = True
+                    self.moved.clear()
+                    return
+            elif isinstance(data, bpy.types.Object) and update.is_updated_transform and data.name in tracked:
+                self.moved.add(data.name)
+
+    @property
+    def parser(self) -> IFCParser:
+        if self.stale or self.current is None:
+            self.current = IFCParser(self.root, **self.options)
+            self.current.execute()
+            self.stale = False
+            self.moved.clear()
+        elif self.moved:
+            objects = [bpy.data.objects[name] for name in self.moved if name in bpy.data.objects]
+            moved = TransformSnapshot.from_objects(objects)
+            self.current.ifc_info.update_transforms(moved)
+            # Kept current too: XMLCreate reads it instead of capturing its own.
+            if self.current.transforms is not None:
+                self.current.transforms.update(moved)
+            logger.debug("Live index refreshed %d moved objects.", len(objects))
+            self.moved.clear()
+        return self.current
+
+
+@persistent
+def live_index_depsgraph_update(scene, depsgraph):
+    for index in IFCLiveIndex.registered:
+        index.on_depsgraph_update(scene, depsgraph)
+
+
+@persistent
+def live_index_load_post(*args):
+    for index in IFCLiveIndex.registered:
+        index.on_load_post()
+
+
+live_index = None
+
+
+def register_live_index(root="IfcBuilding/", **options) -> IFCLiveIndex:
+    global live_index
+    unregister_live_index()
+    live_index = IFCLiveIndex(root, **options)
+    live_index.register()
+    return live_index
+
+
+def unregister_live_index():
+    global live_index
+    if live_index is not None:
+        live_index.unregister()
+        live_index = None
 
 
 class IFCBuilder:
-    def __init__(self, parser: IFCParser):
-        self.parser = parser
-        self.ifc_info = parser.ifc_info
+    # ID properties on every built instance: the source object name, the IFCParser.scope it was
+    # built from, and the instance's own name at creation. resync only touches instances of the
+    # same root and filters that still have that name: a Shift+D copy carries the properties over
+    # under another name and is left alone.
+    key = "ifc_key"
+    scope_key = "ifc_scope"
+    name_key = "ifc_inst"
+
+    def __init__(self, parser: IFCParser = None, bulk: bool = False, profiler: MemoryProfiler = None,
+                 batch: bool = True, mode: str = None, sync: bool = False, live_index: IFCLiveIndex = None):
+        # Without a parser, the live index's current parse is used instead of running a new one.
+        self.parser = parser if parser is not None else live_index.parser
+        self.ifc_info = self.parser.ifc_info
+        self.bulk = bulk
+        # "topological" (build_topological), "bulk" (build_bulk) or "ops" (build + assemble + set_transform).
+        self.mode = mode or ("bulk" if bulk else "topological")
+        # Reuse the instances of an earlier run instead of building new ones, see resync.
+        self.sync = sync
+        self.report = {"created": 0, "updated": 0, "unchanged": 0, "removed": 0}
+        self.batch = batch
+        self.profiler = profiler or self.parser.profiler
 
         self.is_executed = False
 
@@ -236,49 +1240,205 @@ class IFCBuilder:
         # Select the root collection.
         bpy.context.view_layer.active_layer_collection = bpy.context.view_layer.layer_collection
         if not self.ifc_info:
-            print("IFC elements has not been parsed, would not build IFC objects.")
+            logger.warning("IFC elements has not been parsed, would not build IFC objects.")
             return
         for obj, elem in self.ifc_info.items():
-            self.ifc_info[obj]["ifc_inst"] = BlenderOperator().add_object(obj).name
+            inst = BlenderOperator().add_object(obj)
+            self.tag(inst, obj)
+            self.ifc_info[obj]["ifc_inst"] = inst.name
+
+    def build_bulk(self):
+        # Same result as build + assemble + set_transform, without bpy.ops and name lookups.
+        if not self.ifc_info:
+            logger.warning("IFC elements has not been parsed, would not build IFC objects.")
+            return
+        info = self.ifc_info
+        instances = BlenderOperator.new_objects(info.keys(), bpy.context.scene.collection)
+        for i, inst in enumerate(instances.values()):
+            self.tag(inst, info.names[i])
+            info.ifc_inst[i] = inst.name
+            parent = instances.get(info.parent_name(i))
+            if parent:
+                inst.parent = parent
+        self.set_transform()
+
+    def build_topological(self, existing: dict = None):
+        """Create every instance parent first, with its parent and transform set at creation.
+
+        One pass over the rows and no name lookups, with the same result as build + assemble +
+        set_transform: instances in the scene collection, the parent assigned directly so
+        matrix_parent_inverse stays identity, and the stored world position, rotation and scale
+        written as the local transform, as set_transform does.
+
+        existing maps keys to instances of an earlier run; those are reused and only changed
+        where they differ. Reused instances are popped from it, so what is left over is stale.
+        """
+        if not self.ifc_info:
+            logger.warning("IFC elements has not been parsed, would not build IFC objects.")
+            return
+        info = self.ifc_info
+        coll = bpy.context.scene.collection
+        parents = info.parent.tolist()
+        positions = info.position.tolist()
+        rotations = info.rotation.tolist()
+        scales = info.scale.tolist()
+        instances = {}
+        for row in info.parent_first():
+            name = info.names[row]
+            parent = instances[parents[row]] if parents[row] >= 0 else None
+            inst = existing.pop(name, None) if existing else None
+            if inst is None:
+                inst = bpy.data.objects.new(name, None)
+                self.tag(inst, name)
+                BlenderOperator.link(inst, coll)
+                self.place(inst, parent, positions[row], rotations[row], scales[row])
+                self.report["created"] += 1
+            elif self.place(inst, parent, positions[row], rotations[row], scales[row]):
+                self.report["updated"] += 1
+            else:
+                self.report["unchanged"] += 1
+            instances[row] = inst
+            info.ifc_inst[row] = inst.name
+
+    def tag(self, inst: bpy.types.Object, name: str) -> None:
+        inst[self.key] = name
+        inst[self.scope_key] = self.parser.scope
+        inst[self.name_key] = inst.name
+
+    @staticmethod
+    def place(inst: bpy.types.Object, parent, location, rotation, scale) -> bool:
+        """Give inst this parent and local transform; False if it already had them."""
+        changed = False
+        if inst.parent != parent:
+            inst.parent = parent
+            inst.matrix_parent_inverse.identity()
+            changed = True
+        if tuple(inst.location) != tuple(location):
+            inst.location = location
+            changed = True
+        if tuple(inst.rotation_euler) != tuple(rotation):
+            inst.rotation_euler = rotation
+            changed = True
+        if tuple(inst.scale) != tuple(scale):
+            inst.scale = scale
+            changed = True
+        return changed
+
+    def resync(self):
+        """Bring the instances of earlier runs in line with ifc_info instead of adding duplicates.
+
+        Instances are matched on their key property: matches are updated where they differ,
+        records without one are created, and keyed instances without a record are removed.
+        Only builder-made instances of the same root and filters are considered (see the class
+        properties); those of other roots or scopes, and user copies, are left alone.
+        """
+        scope = self.parser.scope
+        existing = {}
+        stale = []
+        for ob in bpy.data.objects:
+            key = ob.get(self.key)
+            if key is None or ob.get(self.scope_key) != scope or ob.get(self.name_key) != ob.name:
+                continue
+            # Several builds without sync leave one instance per key each: keep the first.
+            if key in existing:
+                stale.append(ob)
+            else:
+                existing[key] = ob
+        self.build_topological(existing)
+        stale.extend(existing.values())
+        if stale:
+            logger.info("[resync] Removing %d instances: %s", len(stale), [ob.name for ob in stale[:10]])
+        for ob in stale:
+            bpy.data.objects.remove(ob)
+        self.report["removed"] += len(stale)
+        if stale:
+            BlenderOperator.invalidate()
+        logger.info("[resync] %d created, %d updated, %d unchanged, %d removed.", self.report["created"],
+                    self.report["updated"], self.report["unchanged"], self.report["removed"])
 
     def assemble(self):
+        pairs = []
         for obj, ifc_info in self.ifc_info.items():
-            inst = self.ifc_info[obj]["ifc_inst"]
-            ifc_parent = self.ifc_info[obj]["ifc_parent"]
+            ifc_parent = ifc_info["ifc_parent"]
             if not ifc_parent:
                 continue
-            parent = self.ifc_info[ifc_parent]["ifc_inst"]
-            inst = bpy.data.objects.get(inst)
-            parent = bpy.data.objects.get(parent)
-            BlenderOperator().set_parent(inst, parent, True)
+            inst = bpy.data.objects.get(ifc_info["ifc_inst"])
+            parent = bpy.data.objects.get(self.ifc_info[ifc_parent]["ifc_inst"])
+            pairs.append((inst, parent))
+        BlenderOperator().reparent_many(pairs)
 
     def set_transform(self):
-        for obj, ifc_info in self.ifc_info.items():
-            inst = self.ifc_info[obj]["ifc_inst"]
-            transform = self.ifc_info[obj]["transform"]
-            position = transform["position"]
-            rotation = transform["rotation"]
-            scale = transform["scale"]
-            BlenderOperator().set_location(inst, position)
-            BlenderOperator().set_rotation(inst, rotation)
-            BlenderOperator().set_scale(inst, scale)
+        """Write location, rotation_euler and scale of every instance with one foreach_get/set each.
+
+        foreach_set only takes whole collections, so the current values of all objects are read,
+        the instance rows overwritten and everything written back; untouched objects get their own
+        float32 values again. Instance names are resolved against one name -> index map.
+        """
+        info = self.ifc_info
+        objects = bpy.data.objects
+        index = {name: i for i, name in enumerate(objects.keys())}
+        rows = np.fromiter((index.get(inst, -1) for inst in info.ifc_inst), dtype=np.intp, count=len(info))
+        found = rows >= 0
+        if not found.all():
+            missing = [info.ifc_inst[i] for i in np.flatnonzero(~found)]
+            logger.warning("[set_transform] %d instances not found: %s", len(missing), missing[:10])
+        buffer = np.empty((len(objects), 3), dtype=np.float32)
+        for attr, values in (("location", info.position), ("rotation_euler", info.rotation), ("scale", info.scale)):
+            objects.foreach_get(attr, buffer.ravel())
+            buffer[rows[found]] = values[found]
+            objects.foreach_set(attr, buffer.ravel())
+
+    def iter_build(self, records):
+        """Build each streamed (name, IFCRecord) as it arrives and yield (name, record, instance).
+
+        Only instances that can be parents, the Empties named after a collection, are kept around.
+        """
+        self.is_executed = True
+        coll = bpy.context.scene.collection
+        parents = {}
+        for name, record in records:
+            inst = bpy.data.objects.new(name, None)
+            self.tag(inst, name)
+            BlenderOperator.link(inst, coll)
+            record.ifc_inst = inst.name
+            parent = parents.get(record.ifc_parent)
+            if parent:
+                inst.parent = parent
+            inst.location = record.transform["position"]
+            inst.rotation_euler = record.transform["rotation"]
+            inst.scale = record.transform["scale"]
+            if record.bl_type == "Collection":
+                parents[name] = inst
+            yield name, record, inst
 
     def execute(self):
         self.is_executed = True
         if not self.parser.is_executed:
-            return print("IFC Parser has not been executed, would not build IFC objects.")
+            return logger.warning("IFC Parser has not been executed, would not build IFC objects.")
 
-        print("Building new IFC objects...")
-        self.build()
-        self.assemble()
-        self.set_transform()
-        print("New IFC objects has been built.")
+        logger.info("Building new IFC objects...")
+        # The scene may have changed since the membership map was last built.
+        BlenderOperator.invalidate()
+        with profile_stage(self.profiler, "IFCBuilder", len(self.ifc_info)), \
+                batch_edit() if self.batch else nullcontext():
+            if self.sync:
+                self.resync()
+            elif self.mode == "topological":
+                self.build_topological()
+            elif self.mode == "bulk":
+                self.build_bulk()
+            else:
+                self.build()
+                self.assemble()
+                self.set_transform()
+        logger.info("New IFC objects has been built.")
 
 
 class IFCETree:
-    def __init__(self, builder: IFCBuilder):
+    def __init__(self, builder: IFCBuilder, profiler: MemoryProfiler = None):
         self.builder = builder
         self.ifc_info = builder.ifc_info
+        self.profiler = profiler or builder.profiler
         self.elements = {}
         self.attributes = {}
 
@@ -312,20 +1472,30 @@ class IFCETree:
 
     def execute(self):
         if not self.builder.is_executed:
-            return print("IFC builder has not been executed, would not build ETree.")
+            return logger.warning("IFC builder has not been executed, would not build ETree.")
 
-        self.establish()
-        for obj, ifc_elem in self.elements.items():
-            ifc_elem.set_attr("id", "my_custom_id")
-            # print(f"Element {obj} has been added to ETree, with element {ifc_elem}.")
+        with profile_stage(self.profiler, "IFCETree", len(self.ifc_info)):
+            self.establish()
+            for obj, ifc_elem in self.elements.items():
+                ifc_elem.set_attr("id", "my_custom_id")
+                # print(f"Element {obj} has been added to ETree, with element {ifc_elem}.")
 
-        print("IFC ETree elements has been set attributes.")
+        logger.info("IFC ETree elements has been set attributes.")
         #
         # for obj, ifc_elem in self.elements.items():
         #     ifc_elem.remove_attr("id")
         #
         # print("IFC ETree elements has been removed attributes.")
 
+    def execute_stream(self, builds):
+        # Consumes IFCBuilder.iter_build; elements are not kept, so memory stays flat.
+        count = 0
+        for name, record, inst in builds:
+            self.Element(inst).set_attr("id", "my_custom_id")
+            count += 1
+        logger.info("IFC ETree elements has been set attributes (%d streamed).", count)
+        return count
+
 
 #
 #
@@ -370,11 +1540,30 @@ class IFCETree:
 # blender_element.remove_attr("id")
 # print(blender_element.attributes)  # 輸出：{'id': 'my_custom_id'}
 
+
+def run_stream(root="IfcProject/"):
+    ifc_parser = IFCParser(root)
+    ifc_builder = IFCBuilder(ifc_parser)
+    blender_etree = IFCETree(ifc_builder)
+    return blender_etree.execute_stream(ifc_builder.iter_build(ifc_parser.iter_records()))
+
+
+def run_live(root="IfcBuilding/", **options) -> IFCETree:
+    """Build and tree the registered live index, registering one for root first if there is none."""
+    index = live_index or register_live_index(root, **options)
+    ifc_builder = IFCBuilder(live_index=index, sync=True)
+    ifc_builder.execute()
+    blender_etree = IFCETree(ifc_builder)
+    blender_etree.execute()
+    return blender_etree
+
+
 if __name__ == "__main__":
     # ifc_parser = IFCParser("IfcBuilding/高雄港埠旅運中心")
     ifc_parser = IFCParser("IfcProject/")
     ifc_parser.execute()
-    ifc_builder = IFCBuilder(ifc_parser)
+    # Rerunning the script updates the instances of the previous run.
+    ifc_builder = IFCBuilder(ifc_parser, sync=True)
     ifc_builder.execute()
     blender_etree = IFCETree(ifc_builder)
     blender_etree.execute()
@@ -3,10 +3,16 @@
 # ------------------------------------------------------------------------------------------
 
 import bpy
+import logging
 import re
 import os
+import sys
+from contextlib import nullcontext
 
-os.system('cls')
+sys.path.append(os.path.dirname(os.path.realpath(__file__)))
+from bim_common import batch_edit, configure_logging
+
+logger = configure_logging().getChild("fbx")
 
 
 def create_col(str, parent):
@@ -39,15 +45,13 @@ def create_col(str, parent):
 
 
 def select_col(str):
-    cols = bpy.context.view_layer.layer_collection.children
-
-    def search(col):
-        for col in col.children:
-            if col.name == str:
-                bpy.context.view_layer.active_layer_collection = col
-            search(col)
-
-    search(bpy.context.view_layer.layer_collection)
+    # Layer collections have no children_recursive; walked in pre-order, the last match wins.
+    stack = list(bpy.context.view_layer.layer_collection.children)[::-1]
+    while stack:
+        col = stack.pop()
+        if col.name == str:
+            bpy.context.view_layer.active_layer_collection = col
+        stack.extend(list(col.children)[::-1])
     return bpy.context.collection
 
 
@@ -56,7 +60,7 @@ def export_fbx(target):
 
     if mesh_objects and bpy.context.mode == 'OBJECT':
 
-        bpy.ops.object.select_all(action='DESELECT')
+        deselect_all()
 
         for o in mesh_objects:
             o.select_set(True)
@@ -76,7 +80,13 @@ def export_fbx(target):
             use_selection=True)
 
         # Delete all duplicates
-        bpy.ops.object.select_all(action='DESELECT')
+        deselect_all()
+
+
+def deselect_all():
+    # object.select_all would update the view layer first; the FBX export is the only operator left.
+    for o in bpy.context.selected_objects:
+        o.select_set(False)
 
 
 def create_col_recursion(str, parent, limit=3, offset=0):
@@ -100,7 +110,7 @@ def create_col_recursion(str, parent, limit=3, offset=0):
 
         # Moves the object to a new collection at the last recursion.
         if depth == 1:
-            print(">>> \"{}\" <<<.".format(exist_col.name))
+            logger.debug(">>> \"%s\" <<<.", exist_col.name)
             for o in objs:
 
                 if not bpy.data.collections.get(re_current[0]):
@@ -129,54 +139,41 @@ def rename_recurse(pattern, sub, str):
     if not target:
         return
 
-    def recurse(current):
+    for current in [target, *target.children_recursive]:
         current.name = re.sub(pattern, sub, current.name)
         for o in [o for o in current.objects]:
             o.name = re.sub(pattern, sub, o.name)
 
-        if not current.children:
-            return
-
-        for next in current.children:
-            recurse(next)
-
-    recurse(target)  # starts the recursion
     return re.sub(pattern, sub, str)
 
 
 def export_fbx_recurse(str):
-    all_cols_sets = [c for c in bpy.data.collections]
-    total = float(len(all_cols_sets))
+    total = float(len(bpy.data.collections))
 
     target = bpy.data.collections.get(str)
     if not target:
         return
 
-    def recurse(current):
+    for done, current in enumerate([target, *target.children_recursive]):
         if current.objects:
             export_fbx(current)
-            cur = total - len(all_cols_sets)
-            percentage = round((cur / total) * 100, 2)
-            p = progress_bar(percentage, '#', 40)
-            print(">>> fbx progress rate: [{}]  {} % ({}/{}) / \"{}\" done.".format(p, percentage, int(cur), int(total),
-                                                                                    current.name))
-            cur = cur + 1
-
-        all_cols_sets.remove(current)
-
-        if not current.children:
-            return
-
-        for next in current.children:
-            recurse(next)
-
-    recurse(target)  # starts the recursion
+            log_progress("fbx", done, total, current.name)
 
 
 def remap(value, omin, omax, nmin, nmax):
     return (((value - omin) * (nmax - nmin)) / (omax - omin)) + nmin
 
 
+def log_progress(label, current, total, name, level=logging.INFO):
+    # Building the bar is skipped entirely when the level is disabled.
+    if not logger.isEnabledFor(level):
+        return
+    percentage = round((current / total) * 100, 2)
+    p = progress_bar(percentage, '#', 40)
+    logger.log(level, ">>> %s progress rate: [%s]  %s %% (%s/%s) / \"%s\" done.",
+               label, p, percentage, int(current), int(total), name)
+
+
 def progress_bar(percentage, item, length):  # 0-100
     bar = ''
     for i in range(0, length):
@@ -185,35 +182,32 @@ def progress_bar(percentage, item, length):  # 0-100
     return re.sub(' ', item, bar, int(percent_i))
 
 
-def run_batch():
-    # ------------------------------------
-    # User defined
-    # ------------------------------------
-    prefix_name = '__inst__'
-    root_col_name = 'IfcBuilding/'
-    # ------------------------------------
+def run_batch(root_col_name='IfcBuilding/', prefix_name='__inst__', batch=True):
+    with batch_edit() if batch else nullcontext():
+        run_batch_steps(root_col_name, prefix_name)
+
+
+def run_batch_steps(root_col_name, prefix_name):
 
     if prefix_name == '':
         prefix_name = '_'
 
-    print("")
-    print("------------------------------")
-    print("--- STARTING PROGRESS SOON ---")
-    print("------------------------------")
-    print("")
+    logger.info("\n------------------------------\n"
+                "--- STARTING PROGRESS SOON ---\n"
+                "------------------------------\n")
 
     # ------------------------------------
     # Step 1
     # ------------------------------------
     if not bpy.data.collections.get(root_col_name):
-        print(">>> \"{}\" not found, will end the script.".format(root_col_name))
+        logger.warning(">>> \"%s\" not found, will end the script.", root_col_name)
         # Exit the script.
         return
 
     # Fix the ignore string.
     root_col = select_col(root_col_name)
     rename_recurse('[^A-Za-z0-9/:_]', 'x', root_col.name)
-    print(">>> \"{}\" has found that the script will be executed.".format(root_col.name))
+    logger.info(">>> \"%s\" has found that the script will be executed.", root_col.name)
     root_col_new = create_col(prefix_name + root_col_name, bpy.context.scene.collection)
 
     # ------------------------------------
@@ -228,41 +222,25 @@ def run_batch():
         layer_col_new = create_col(layer_col_name, root_col_new)
 
         class_col_sets = [c for c in layer_col.children]
-        for class_col in class_col_sets:
+        for current, class_col in enumerate(class_col_sets):
             create_col_recursion(class_col.name, layer_col_new, 5, -1)
-
-            current = float(class_col_sets.index(class_col))
-            total = float(len(class_col_sets))
-            percentage = round((current / total) * 100, 2)
-            p = progress_bar(percentage, '#', 40)
-            # print(">>> class_col progress rate: [{}]  {} % ({}/{}) / \"{}\" done.".format(p, percentage, int(current),
-            #                                                                               int(total), class_col.name))
+            log_progress("class_col", current, len(class_col_sets), class_col.name, logging.DEBUG)
 
             bpy.data.collections.remove(class_col)
 
-        current = float(layer_col_sets.index(layer_col))
-        total = float(len(layer_col_sets))
-        percentage = round((current / total) * 100, 2)
-        p = progress_bar(percentage, '#', 40)
-        # print(">>> class_col progress rate: [{}]  {} % ({}/{}) / \"{}\" done.".format(p, percentage, int(current),
-        #                                                                               int(total), layer_col.name))
+        log_progress("layer_col", layer_col_sets.index(layer_col), len(layer_col_sets), layer_col.name, logging.DEBUG)
 
         objs = [o for o in layer_col.objects if o.type == 'MESH']
-        for o in objs:
-            if len(o.BIMAttributeProperties.attributes.keys()) > 0:
-                print(o.BIMAttributeProperties.attributes.keys())
+        for current, o in enumerate(objs):
+            if logger.isEnabledFor(logging.DEBUG) and len(o.BIMAttributeProperties.attributes.keys()) > 0:
+                logger.debug("%s", o.BIMAttributeProperties.attributes.keys())
             create_col_recursion(o.name, layer_col_new, 5, -1)
             try:
                 name_with_id = o.name + '_' + o.BIMAttributeProperties.attributes['Tag'].string_value
                 o.name = name_with_id
             except:
                 pass
-            current = float(objs.index(o))
-            total = float(len(objs))
-            percentage = round((current / total) * 100, 2)
-            p = progress_bar(percentage, '#', 40)
-            print(">>> objs progress rate: [{}]  {} % ({}/{}) / \"{}\" done.".format(p, percentage, int(current),
-                                                                                     int(total), o.name))
+            log_progress("objs", current, len(objs), o.name)
 
         # Remove unneeded collections originals.
         bpy.data.collections.remove(layer_col)
@@ -275,11 +253,11 @@ def run_batch():
     # ------------------------------------
     # Step 2 - Complete the output, report and prompt.
     # ------------------------------------
-    print("")
-    print("------------------------------")
-    print("--- ALL PROGRESS COMPLETED ---")
-    print("------------------------------")
+    logger.info("\n------------------------------\n"
+                "--- ALL PROGRESS COMPLETED ---\n"
+                "------------------------------")
 
 
-run_batch()
+if __name__ == "__main__":
+    run_batch()
 # ---
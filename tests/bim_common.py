@@ -0,0 +1,215 @@
+"""Helpers shared by the IFC parse/build script, the XML exporter and the FBX batch.
+
+The scripts are run one by one from Blender and put their own folder (or its parent) on sys.path
+before importing this module.
+"""
+import bpy
+import logging
+import os
+import sys
+import time
+import numpy as np
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+LOG_LEVEL = os.environ.get("BIM_TO_XML_LOG_LEVEL", "INFO")
+LOG_RATE_LIMIT = float(os.environ.get("BIM_TO_XML_LOG_RATE_LIMIT", 0))
+
+
+class RateLimitFilter(logging.Filter):
+    """Let through at most `per_second` records per message template, 0 for no limit."""
+
+    def __init__(self, per_second: float = 0):
+        super().__init__()
+        self.per_second = per_second
+        self.windows = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not self.per_second:
+            return True
+        now = time.monotonic()
+        start, count = self.windows.get(record.msg, (now, 0))
+        if now - start >= 1.0:
+            start, count = now, 0
+        self.windows[record.msg] = (start, count + 1)
+        return count < self.per_second
+
+
+def configure_logging(level=LOG_LEVEL, rate_limit=LOG_RATE_LIMIT) -> logging.Logger:
+    # "QUIET" silences everything, for production runs.
+    logger = logging.getLogger("bim_to_xml")
+    if not logger.handlers:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.propagate = False
+    for handler in logger.handlers:
+        handler.filters = [RateLimitFilter(rate_limit)]
+    logger.setLevel(logging.CRITICAL + 1 if str(level).upper() == "QUIET" else level)
+    return logger
+
+
+def max_rss_bytes() -> int | None:
+    """Peak resident set size of this process, None where it cannot be read."""
+    if sys.platform == "win32":
+        return peak_working_set_bytes()
+    # ru_maxrss is in KiB on Linux and in bytes on macOS.
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def peak_working_set_bytes() -> int | None:
+    # Windows has no getrusage; PeakWorkingSetSize is its peak RSS.
+    import ctypes
+    from ctypes import wintypes
+
+    class ProcessMemoryCounters(ctypes.Structure):
+        _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [
+            (name, ctypes.c_size_t) for name in (
+                "PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage", "QuotaPagedPoolUsage",
+                "QuotaPeakNonPagedPoolUsage", "QuotaNonPagedPoolUsage", "PagefileUsage", "PeakPagefileUsage")]
+
+    counters = ProcessMemoryCounters()
+    counters.cb = ctypes.sizeof(counters)
+    kernel32 = ctypes.WinDLL("kernel32")
+    psapi = ctypes.WinDLL("psapi")
+    kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+    psapi.GetProcessMemoryInfo.argtypes = [wintypes.HANDLE, ctypes.POINTER(ProcessMemoryCounters), wintypes.DWORD]
+    psapi.GetProcessMemoryInfo.restype = wintypes.BOOL
+    if not psapi.GetProcessMemoryInfo(kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb):
+        return None
+    return counters.PeakWorkingSetSize
+
+
+# Nesting depth of batch_edit(), read through in_batch().
+batch_depth = 0
+# Called with no arguments when the outermost batch_edit() ends, before the view layer update.
+batch_listeners = []
+
+
+def in_batch() -> bool:
+    return batch_depth > 0
+
+
+@contextmanager
+def batch_edit(update: bool = True):
+    """Group many scene edits and evaluate the view layer once at the end.
+
+    Handlers of these scripts check in_batch() and skip intermediate states; batch_listeners hear
+    once when the outermost batch ends. Handlers of other add-ons stay registered. Inside the batch
+    use bpy.data rather than bpy.ops: the operator wrapper updates the view layer before each call.
+    """
+    global batch_depth
+    batch_depth += 1
+    try:
+        yield
+    finally:
+        batch_depth -= 1
+        if not batch_depth:
+            for listener in list(batch_listeners):
+                listener()
+            if update:
+                bpy.context.view_layer.update()
+
+
+class TransformSnapshot:
+    """World transforms of a set of objects, read with one foreach_get and decomposed with NumPy.
+
+    foreach_get fills every matrix column by column, so matrices[n, i] is the i-th column (axis) of
+    object n and matrices[n, 3, :3] its translation. The decomposition follows mathutils: to_scale is
+    the length of each axis and to_euler picks the smaller of the two XYZ solutions of the normalized
+    matrix.
+    """
+
+    def __init__(self, names: list, matrices: np.ndarray):
+        self.names = names
+        self.index = {name: i for i, name in enumerate(names)}
+        self.matrices = matrices
+        self.position, self.rotation, self.scale = self.decompose(matrices)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.index
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @classmethod
+    def capture(cls, objects=None):
+        objects = bpy.data.objects if objects is None else objects
+        buffer = np.empty(len(objects) * 16, dtype=np.float32)
+        objects.foreach_get("matrix_world", buffer)
+        return cls(objects.keys(), buffer.reshape(-1, 4, 4))
+
+    @classmethod
+    def from_collections(cls, collections):
+        """The objects of these collections only, one foreach_get per collection.
+
+        An object linked into several of them gets several identical rows; index keeps the last.
+        """
+        names = []
+        parts = [np.empty((0, 4, 4), dtype=np.float32)]
+        for coll in collections:
+            objects = coll.objects
+            buffer = np.empty(len(objects) * 16, dtype=np.float32)
+            objects.foreach_get("matrix_world", buffer)
+            names.extend(objects.keys())
+            parts.append(buffer.reshape(-1, 4, 4))
+        return cls(names, np.concatenate(parts))
+
+    @classmethod
+    def from_objects(cls, objects: list):
+        # For a handful of objects; mathutils matrices are row-major, foreach_get is column-major.
+        matrices = np.array([ob.matrix_world for ob in objects], dtype=np.float32).reshape(-1, 4, 4)
+        return cls([ob.name for ob in objects], matrices.transpose(0, 2, 1).copy())
+
+    def update(self, other: "TransformSnapshot") -> None:
+        """Overwrite the rows of the objects other holds, e.g. a from_objects() of the ones that moved."""
+        pairs = [(self.index[name], i) for i, name in enumerate(other.names) if name in self.index]
+        if not pairs:
+            return
+        rows, source = np.array(pairs, dtype=np.intp).T
+        self.matrices[rows] = other.matrices[source]
+        self.position[rows] = other.position[source]
+        self.rotation[rows] = other.rotation[source]
+        self.scale[rows] = other.scale[source]
+
+    @staticmethod
+    def decompose(matrices: np.ndarray) -> tuple:
+        position = matrices[:, 3, :3].copy()
+        axes = matrices[:, :3, :3]
+        scale = np.sqrt(np.einsum("nij,nij->ni", axes, axes))
+        m = axes / np.where(scale == 0.0, 1.0, scale)[:, :, None]
+
+        cy = np.hypot(m[:, 0, 0], m[:, 0, 1])
+        eul1 = np.stack([
+            np.arctan2(m[:, 1, 2], m[:, 2, 2]),
+            np.arctan2(-m[:, 0, 2], cy),
+            np.arctan2(m[:, 0, 1], m[:, 0, 0])
+        ], axis=1)
+        eul2 = np.stack([
+            np.arctan2(-m[:, 1, 2], -m[:, 2, 2]),
+            np.arctan2(-m[:, 0, 2], -cy),
+            np.arctan2(-m[:, 0, 1], -m[:, 0, 0])
+        ], axis=1)
+        gimbal = cy <= 16.0 * np.finfo(np.float32).eps
+        if gimbal.any():
+            eul1[gimbal, 0] = np.arctan2(-m[gimbal, 2, 1], m[gimbal, 1, 1])
+            eul1[gimbal, 2] = 0.0
+            eul2[gimbal] = eul1[gimbal]
+        use_eul2 = np.abs(eul1).sum(axis=1) > np.abs(eul2).sum(axis=1)
+        rotation = np.where(use_eul2[:, None], eul2, eul1)
+        return position, rotation, scale
+
+    def get(self, name: str, cast=float) -> dict:
+        i = self.index[name]
+        return {
+            "position": tuple(cast(v) for v in self.position[i].tolist()),
+            "rotation": tuple(cast(v) for v in self.rotation[i].tolist()),
+            "scale": tuple(cast(v) for v in self.scale[i].tolist())
+        }
@@ -0,0 +1,54 @@
+"""Classification half of IFCParser.read_ifc, free of bpy so it can run in worker processes.
+
+Workers receive the names of the parsed collections once (initializer), then chunks of object names
+with the name of each object's parent collection. Each chunk comes back columnar: per IFCInfo.categories
+column an int32 code array with its own values table (code 0 is None), and the parent as an index
+into the collection names (-1 for none). IFCInfo.merge_chunks joins the chunks with np.concatenate.
+The values are those IFCParser.define_bl_type / tokenize and IFCRecord produce.
+"""
+import sys
+import numpy as np
+
+CLASS_FIELDS = {
+    "IfcProject": 1,
+    "IfcSite": 2,
+    "IfcBuilding": 3,
+    "IfcBuildingStorey": 4,
+}
+CATEGORY_COUNT = 6
+
+_collections = {}
+
+
+def init_worker(collections: list) -> None:
+    global _collections
+    _collections = {name: i for i, name in enumerate(collections)}
+
+
+def classify(name: str) -> tuple:
+    # (bl_type, ifc_type, ifc_project, ifc_site, ifc_building, ifc_storey)
+    row = ["Collection" if name in _collections else "Object", None, None, None, None, None]
+    if not name.startswith("Ifc"):
+        return tuple(row)
+    head, sep, rest = name.partition("/")
+    row[1] = sys.intern(head)
+    field = CLASS_FIELDS.get(head)
+    if sep and field:
+        row[1 + field] = rest.partition("/")[0]
+    return tuple(row)
+
+
+def classify_chunk(chunk: tuple) -> tuple:
+    """(names, parent collection names) -> (codes (6, n) int32, values per column, parent indices)."""
+    names, parents = chunk
+    tables = [{None: 0} for _ in range(CATEGORY_COUNT)]
+    columns = [[] for _ in range(CATEGORY_COUNT)]
+    for name in names:
+        for table, column, value in zip(tables, columns, classify(name)):
+            code = table.get(value)
+            if code is None:
+                code = table[value] = len(table)
+            column.append(code)
+    codes = np.array(columns, dtype=np.int32).reshape(CATEGORY_COUNT, len(names))
+    parent = np.fromiter((_collections.get(parent, -1) for parent in parents), dtype=np.int32, count=len(parents))
+    return codes, [list(table) for table in tables], parent